@@ -0,0 +1,8 @@
+"""解释器的性能测试
+
+    python -m bench                     运行 workloads 中的全部程序
+    python -m bench.numeric             比较 numeric 模块与手写循环
+    python -m bench.frontend            词法分析与语法分析的规模测试
+    python -m bench.generate            生成指定结构与大小的 Monkey 程序
+    python -m bench.stress              多线程同时运行 workloads, 检查结果是否一致
+"""
@@ -0,0 +1,4 @@
+from bench.runner import main
+
+
+main()
@@ -0,0 +1,154 @@
+"""测试词法分析与语法分析随输入规模与结构的变化
+
+    python -m bench.frontend [--shapes long,nested,hash,chain]
+                             [--sizes 1K,10K,100K,1M] [--repeat 3]
+                             [--json out.json] [--threshold 1.2]
+
+对每种结构与每个大小生成程序, 统计 tokens/s、nodes/s 以及每个 AST 节点
+占用的内存, 并按 time = c * size ** k 拟合各阶段的复杂度. 指数 k 超过 threshold
+的阶段被视为超线性, 进程以状态码 1 退出. 规模可以一直增加到 100M,
+但生成的 AST 会占用数十倍于源码的内存
+"""
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+from lexer import Lexer, TokenStream, tokenize
+from parser import Parser
+from parser import ast
+from bench.generate import SHAPES, generate, parse_size
+from bench.runner import percentile
+
+
+def count_nodes(program: ast.Program) -> int:
+    """统计 AST 中的节点个数"""
+    count = 0
+    stack: list[ast.Node] = [program]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for v in vars(node).values():
+            if isinstance(v, ast.Node):
+                stack.append(v)
+            elif isinstance(v, list):
+                stack.extend(n for n in v if isinstance(n, ast.Node))
+    return count
+
+
+def measure(code: str, repeat: int) -> dict:
+    """测量一个程序的词法分析与语法分析"""
+    lex, parse = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        tokens = tokenize(code)
+        t1 = time.perf_counter()
+        p = Parser(TokenStream(tokens))
+        program = p.parse_program()
+        t2 = time.perf_counter()
+        if p.errors:
+            raise SystemExit(f"generated program has {len(p.errors)} parser errors, first: {p.errors[0]}")
+        lex.append(t1 - t0)
+        parse.append(t2 - t1)
+    nodes = count_nodes(program)
+    del program, p
+
+    tracemalloc.start()
+    try:
+        program = Parser(Lexer(code)).parse_program()
+        ast_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del program
+
+    lex_s, parse_s = percentile(lex, 50), percentile(parse, 50)
+    return {
+        "bytes": len(code),
+        "tokens": len(tokens),
+        "nodes": nodes,
+        "lex_s": lex_s,
+        "parse_s": parse_s,
+        "tokens_per_s": len(tokens) / lex_s,
+        "nodes_per_s": nodes / parse_s,
+        "bytes_per_node": ast_bytes / nodes,
+    }
+
+
+def fit(sizes: list[int], times: list[float]) -> dict:
+    """拟合复杂度: 对数坐标下的最小二乘斜率即 time = c * size ** k 中的 k,
+    另外在 n, n log n, n^2 中选出相对误差最小的模型"""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(t) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    k = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else float("nan")
+
+    models = {
+        "O(n)": lambda n: n,
+        "O(n log n)": lambda n: n * math.log(n),
+        "O(n^2)": lambda n: n * n,
+    }
+    best, best_err = None, math.inf
+    for name, f in models.items():
+        # 最小化相对误差: t / f(n) 的几何平均作为系数
+        c = math.exp(sum(math.log(t / f(n)) for n, t in zip(sizes, times)) / len(sizes))
+        err = sum(math.log(t / (c * f(n))) ** 2 for n, t in zip(sizes, times))
+        if err < best_err:
+            best, best_err = name, err
+    return {"exponent": k, "model": best}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.frontend")
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--sizes", default="1K,10K,100K,1M")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="largest exponent accepted as linear, default 1.2")
+    args = parser.parse_args()
+
+    shapes = args.shapes.split(",")
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error(f"unknown shape '{shape}', choose from {', '.join(SHAPES)}")
+    sizes = sorted(parse_size(s) for s in args.sizes.split(","))
+    if len(sizes) < 2:
+        parser.error("at least two sizes are needed to fit complexity")
+
+    report = {}
+    flagged = []
+    for shape in shapes:
+        print(f"{shape}:")
+        print(f"  {'bytes':>10} {'tokens':>10} {'nodes':>10} {'lex ms':>9} {'tokens/s':>10} "
+              f"{'parse ms':>9} {'nodes/s':>10} {'B/node':>7}")
+        rows = []
+        for size in sizes:
+            r = measure(generate(shape, size, args.seed), args.repeat)
+            rows.append(r)
+            print(f"  {r['bytes']:10d} {r['tokens']:10d} {r['nodes']:10d} "
+                  f"{r['lex_s'] * 1000:9.2f} {r['tokens_per_s']:10.0f} "
+                  f"{r['parse_s'] * 1000:9.2f} {r['nodes_per_s']:10.0f} {r['bytes_per_node']:7.0f}")
+        fits = {}
+        for phase in ("lex", "parse"):
+            f = fits[phase] = fit([r["bytes"] for r in rows], [r[f"{phase}_s"] for r in rows])
+            mark = ""
+            if f["exponent"] > args.threshold:
+                mark = "  SUPERLINEAR"
+                flagged.append(f"{shape}.{phase}")
+            print(f"  {phase:<5} exponent {f['exponent']:.2f}, best fit {f['model']}{mark}")
+        report[shape] = {"runs": rows, "fit": fits}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if flagged:
+        print(f"\nsuperlinear: {', '.join(flagged)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""生成语法正确的 Monkey 程序, 用于测试词法分析与语法分析随输入规模的变化
+
+    python -m bench.generate long 100K > program.monkey
+
+程序的结构 (shape) 有以下几种:
+
+* long   由各种常见语句组成的长文件
+* nested 深层嵌套的函数与条件表达式, 嵌套深度由 --depth 指定
+* hash   很宽的哈希表字面量, 每个字面量的键值对个数由 --width 指定
+* chain  很长的中缀运算符链, 每条链的操作数个数由 --width 指定
+
+相同的参数与随机种子总是生成相同的程序
+"""
+import argparse
+import random
+import sys
+
+
+SHAPES = ("long", "nested", "hash", "chain")
+
+OPERATORS = ("+", "-", "*", "/", "%", "<", ">", "==", "!=", "<=", ">=", "&", "|", "^", "<<", ">>")
+
+
+def ident(prefix: str, i: int) -> str:
+    """由序号生成标识符, 标识符中不能出现数字, 所以序号用字母表示"""
+    letters = []
+    while True:
+        i, r = divmod(i, 26)
+        letters.append(chr(ord('a') + r))
+        if i == 0:
+            break
+    return prefix + "".join(reversed(letters))
+
+
+def parse_size(text: str) -> int:
+    """解析 1K, 10M 这样的大小"""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().removesuffix("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+class Generator():
+    """按指定的结构逐条生成语句"""
+    def __init__(self, shape: str, seed: int = 0, depth: int = 16, width: int = 256):
+        if shape not in SHAPES:
+            raise ValueError(f"unknown shape '{shape}'")
+        self.shape = shape
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.width = width
+        self.count = 0
+
+    def expression(self, depth: int = 3) -> str:
+        """随机生成一个表达式"""
+        r = self.random
+        kind = r.randrange(6) if depth > 0 else r.randrange(3)
+        match kind:
+            case 0:
+                return str(r.randrange(1000))
+            case 1:
+                return f'"{ident("s_", r.randrange(10000))}"'
+            case 2:
+                return ident("v_", r.randrange(max(self.count, 1)))
+            case 3:
+                op = r.choice(OPERATORS)
+                return f"({self.expression(depth - 1)} {op} {self.expression(depth - 1)})"
+            case 4:
+                items = ", ".join(self.expression(depth - 1) for _ in range(r.randrange(4)))
+                return f"[{items}]"
+            case _:
+                args = ", ".join(self.expression(depth - 1) for _ in range(r.randrange(3)))
+                return f"{ident('f_', r.randrange(max(self.count, 1)))}({args})"
+
+    def long(self) -> str:
+        i = self.count
+        match i % 5:
+            case 0:
+                return f"let {ident('v_', i)} = {self.expression()};"
+            case 1:
+                return (
+                    f"let {ident('f_', i)} = fn(a, b) {{\n"
+                    f"    let t = a * b + {self.expression(1)};\n"
+                    f"    if (t > {i % 100}) {{ return t - 1; }} else {{ return t + 1; }}\n"
+                    f"}};"
+                )
+            case 2:
+                return f"puts({self.expression()}, {self.expression(1)});"
+            case 3:
+                return f"for (x in [1, 2, 3]) {{ puts(x * {self.expression(1)}); }}"
+            case _:
+                return f"let {ident('v_', i)} = if ({self.expression(2)}) {{ {self.expression(2)} }} else {{ {self.expression(2)} }};"
+
+    def nested(self) -> str:
+        lines = [f"let {ident('f_', self.count)} = fn(x) {{"]
+        for level in range(self.depth):
+            indent = "    " * (level + 1)
+            kind = level % 3
+            if kind == 0:
+                lines.append(f"{indent}if (x > {level}) {{")
+            elif kind == 1:
+                lines.append(f"{indent}let g = fn(y) {{")
+            else:
+                lines.append(f"{indent}while (x < {level}) {{")
+        lines.append("    " * (self.depth + 1) + "return x;")
+        for level in reversed(range(self.depth)):
+            indent = "    " * (level + 1)
+            kind = level % 3
+            if kind == 0:
+                lines.append(f"{indent}}} else {{ return {level}; }}")
+            elif kind == 1:
+                lines.append(f"{indent}}};")
+            else:
+                lines.append(f"{indent}}}")
+        lines.append("};")
+        return "\n".join(lines)
+
+    def hash(self) -> str:
+        pairs = []
+        for k in range(self.width):
+            match k % 3:
+                case 0:
+                    value = str(k)
+                case 1:
+                    value = f'"{ident("s_", k)}"'
+                case _:
+                    value = f"[{k}, {self.expression(1)}]"
+            pairs.append(f'"{ident("k_", k)}": {value}')
+        return f"let {ident('h_', self.count)} = {{{', '.join(pairs)}}};"
+
+    def chain(self) -> str:
+        r = self.random
+        terms = [str(r.randrange(1, 1000))]
+        for _ in range(self.width - 1):
+            terms.append(r.choice(OPERATORS))
+            terms.append(str(r.randrange(1, 1000)))
+        return f"let {ident('c_', self.count)} = {' '.join(terms)};"
+
+    def statement(self) -> str:
+        stmt = getattr(self, self.shape)()
+        self.count += 1
+        return stmt
+
+    def generate(self, size: int) -> str:
+        """生成不小于 size 字节的程序"""
+        parts = []
+        total = 0
+        while total < size:
+            stmt = self.statement()
+            parts.append(stmt)
+            total += len(stmt) + 1
+        return "\n".join(parts) + "\n"
+
+
+def generate(shape: str, size: int, seed: int = 0, depth: int = 16, width: int = 256) -> str:
+    return Generator(shape, seed, depth, width).generate(size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.generate")
+    parser.add_argument("shape", choices=SHAPES)
+    parser.add_argument("size", help="program size, e.g. 10K, 1M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=16, help="nesting depth of the nested shape")
+    parser.add_argument("--width", type=int, default=256, help="pairs per hash literal / operands per chain")
+    args = parser.parse_args()
+    sys.stdout.write(generate(args.shape, parse_size(args.size), args.seed, args.depth, args.width))
+
+
+if __name__ == "__main__":
+    main()
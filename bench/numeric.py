@@ -0,0 +1,92 @@
+"""比较 numeric 模块与手写 Monkey 循环的矩阵乘法耗时
+
+    python -m bench.numeric --size 40
+"""
+import argparse
+import time
+import evaluator
+from lexer import Lexer
+from parser import Parser
+from evaluator.objsys import Environment
+
+
+SETUP = """
+import numeric;
+let n = {size};
+let row = fn(i) {{
+    let r = [];
+    while (true) {{
+        if (len(r) == n) {{ return r; }}
+        let r = push(r, i + len(r));
+    }}
+}};
+let rows = fn() {{
+    let m = [];
+    while (true) {{
+        if (len(m) == n) {{ return m; }}
+        let m = push(m, row(len(m)));
+    }}
+}};
+let a = rows();
+let b = rows();
+"""
+
+LOOPS = """
+let dot = fn(ai, b, j) {
+    let s = 0;
+    let k = 0;
+    while (true) {
+        if (k == len(ai)) { return s; }
+        let s = s + ai[k] * b[k][j];
+        let k = k + 1;
+    }
+};
+let matmul_row = fn(ai, b) {
+    let r = [];
+    while (true) {
+        if (len(r) == len(b[0])) { return r; }
+        let r = push(r, dot(ai, b, len(r)));
+    }
+};
+let matmul = fn(a, b) {
+    let c = [];
+    while (true) {
+        if (len(c) == len(a)) { return c; }
+        let c = push(c, matmul_row(a[len(c)], b));
+    }
+};
+matmul(a, b);
+"""
+
+NUMERIC = """
+numeric->to_array(numeric->matmul(numeric->from_array(a), numeric->from_array(b)));
+"""
+
+
+def run(code: str, env: Environment):
+    p = Parser(Lexer(code))
+    program = p.parse_program()
+    assert not p.errors, [str(e) for e in p.errors]
+    start = time.perf_counter()
+    result = evaluator.Eval(program, env)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=40)
+    args = parser.parse_args()
+
+    env = Environment()
+    run(SETUP.format(size=args.size), env)
+    backend = env.get("numeric").env.get("backend").value
+    loops, expected = run(LOOPS, env)
+    numeric, result = run(NUMERIC, env)
+    assert result.inspect() == expected.inspect()
+    print(f"matmul {args.size}x{args.size}")
+    print(f"  {'monkey loops':<20}{loops * 1000:10.2f} ms")
+    print(f"  {f'numeric ({backend})':<20}{numeric * 1000:10.2f} ms  x{loops / numeric:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""运行 workloads 目录中的 Monkey 程序, 分别统计词法分析、语法分析与求值的耗时
+
+    python -m bench [name ...] [--repeat 5] [--warmup 1] [--no-jit]
+                    [--json out.json] [--baseline [base.json]] [--threshold 0.1]
+
+每个程序先不计时地运行 warmup 次, 再计时运行 repeat 次. 每次运行都重新解析,
+所以特化与 JIT 的缓存不会在两次运行之间共享. 计时结束后再在 tracemalloc 下
+运行一次, 得到语法分析与求值阶段的内存峰值.
+
+--json 把结果写入文件, 这个文件可以作为之后运行的 --baseline. 与基线比较时,
+任一阶段耗时的中位数比基线慢超过 threshold 即视为性能退化, 进程以状态码 1 退出.
+基线与本次运行的 JIT 开关不同时不做比较, 以状态码 2 退出; python 版本不同时给出警告.
+
+仓库中提交了基线 bench/baseline.json, 不带路径的 --baseline 与它比较.
+耗时与机器有关, 在其他机器上比较前应先在修改前的代码上重新生成:
+
+    python -m bench --json bench/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import evaluator
+from lexer import Lexer, TokenStream, tokenize
+from parser import Parser
+from evaluator import jit
+from evaluator.builtins import output
+from evaluator.objsys import Environment
+
+
+WORKLOADS = os.path.join(os.path.dirname(__file__), "workloads")
+MODULES = os.path.join(WORKLOADS, "modules")
+"""import 语句以当前目录为起点查找模块, 求值时切换到该目录"""
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+"""仓库中提交的基线结果"""
+
+PHASES = ("lex", "parse", "eval")
+
+NOISE_FLOOR_MS = 5.0
+"""基线中位数低于该值的阶段不参与比较, 避免计时误差被当作退化"""
+
+
+@contextlib.contextmanager
+def sandbox():
+    """在 modules 目录中求值, 并丢弃程序的输出"""
+    cwd = os.getcwd()
+    stream = output.stream
+    os.chdir(MODULES)
+    output.stream = io.StringIO()
+    try:
+        yield
+    finally:
+        output.stream = stream
+        os.chdir(cwd)
+
+
+def run_once(name: str, code: str) -> dict[str, float]:
+    """运行一次程序, 返回各阶段的耗时 (毫秒)"""
+    t0 = time.perf_counter()
+    tokens = tokenize(code)
+    t1 = time.perf_counter()
+    p = Parser(TokenStream(tokens))
+    program = p.parse_program()
+    t2 = time.perf_counter()
+    if p.errors:
+        raise SystemExit(f"{name}: {len(p.errors)} parser errors, first: {p.errors[0]}")
+    with sandbox():
+        result = evaluator.Eval(program, Environment())
+    t3 = time.perf_counter()
+    if evaluator.is_error(result):
+        raise SystemExit(f"{name}: {result.inspect()}")
+    return {
+        "lex": (t1 - t0) * 1000,
+        "parse": (t2 - t1) * 1000,
+        "eval": (t3 - t2) * 1000,
+    }
+
+
+def peak_memory(code: str) -> dict[str, int]:
+    """语法分析 (包括词法分析) 与求值阶段的内存峰值 (字节)"""
+    tracemalloc.start()
+    try:
+        p = Parser(Lexer(code))
+        program = p.parse_program()
+        parse_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        with sandbox():
+            evaluator.Eval(program, Environment())
+        eval_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"parse": parse_peak, "eval": eval_peak}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """线性插值的百分位数, q 取值为 0 到 100"""
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "median": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": sum(samples) / len(samples),
+    }
+
+
+def bench(name: str, repeat: int, warmup: int) -> dict:
+    with open(os.path.join(WORKLOADS, f"{name}.monkey")) as f:
+        code = f.read()
+    for _ in range(warmup):
+        run_once(name, code)
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        for phase, ms in run_once(name, code).items():
+            samples[phase].append(ms)
+    result = {phase: summarize(samples[phase]) for phase in PHASES}
+    result["peak_memory"] = peak_memory(code)
+    result["samples"] = samples
+    return result
+
+
+def minor_version(version: str | None) -> str | None:
+    """3.11.7 -> 3.11, 补丁版本之间的差别不影响比较"""
+    return version.rsplit(".", 1)[0] if version else None
+
+
+def check_meta(base: dict, meta: dict) -> tuple[list[str], list[str]]:
+    """检查基线与本次运行的设置, 返回 (不能比较的原因, 警告).
+    JIT 开关不同时耗时相差数倍, 不能比较; python 版本不同时仍比较, 但给出警告"""
+    errors, warnings = [], []
+    if base.get("jit") != meta["jit"]:
+        errors.append(f"baseline was run with jit={base.get('jit')}, this run with jit={meta['jit']}")
+    if minor_version(base.get("python")) != minor_version(meta["python"]):
+        warnings.append(f"baseline was run on python {base.get('python')}, this run on {meta['python']}")
+    return errors, warnings
+
+
+def compare(
+        results: dict[str, dict],
+        baseline: dict[str, dict],
+        threshold: float
+    ) -> list[str]:
+    """与基线比较各阶段耗时的中位数, 返回退化的项目"""
+    regressions = []
+    print(f"\ncompared with baseline (threshold {threshold:.0%}):")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  {name:<12} not in baseline")
+            continue
+        for phase in PHASES:
+            base = baseline[name][phase]["median"]
+            if base < NOISE_FLOOR_MS:
+                continue
+            ratio = result[phase]["median"] / base
+            mark = ""
+            if ratio > 1 + threshold:
+                mark = "  REGRESSION"
+                regressions.append(f"{name}.{phase}")
+            print(f"  {name:<12} {phase:<6} {base:10.2f} -> {result[phase]['median']:10.2f} ms  {ratio:6.2f}x{mark}")
+    return regressions
+
+
+def main() -> None:
+    workloads = sorted(f[:-7] for f in os.listdir(WORKLOADS) if f.endswith(".monkey"))
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("names", nargs="*", metavar="name", help=f"workloads to run: {', '.join(workloads)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--no-jit", action="store_true")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE, metavar="PATH",
+                        help="compare with a JSON file written by --json, default bench/baseline.json")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, default 0.1 (10%%)")
+    args = parser.parse_args()
+
+    for name in args.names:
+        if name not in workloads:
+            parser.error(f"unknown workload '{name}'")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    jit.enabled = not args.no_jit
+
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jit": jit.enabled,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # 在运行之前检查, 不能比较时不必等待运行结束
+        errors, warnings = check_meta(baseline.get("meta", {}), meta)
+        if errors:
+            print(f"can not compare with {args.baseline}: {'; '.join(errors)}", file=sys.stderr)
+            sys.exit(2)
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+
+    results = {}
+    print(f"{'name':<12} {'lex':>9} {'parse':>9} {'eval':>10} {'eval p90':>10} {'peak KiB':>10}")
+    for name in args.names or workloads:
+        r = results[name] = bench(name, args.repeat, args.warmup)
+        print(
+            f"{name:<12} {r['lex']['median']:9.2f} {r['parse']['median']:9.2f} "
+            f"{r['eval']['median']:10.2f} {r['eval']['p90']:10.2f} "
+            f"{max(r['peak_memory'].values()) / 1024:10.0f}"
+        )
+    print("times are medians in ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,77 @@
+"""在多个线程中同时运行 workloads 中的程序, 检查结果与输出是否与单线程运行一致
+
+    python -m bench.stress [--threads 8] [--runs 64] [--switch-interval 1e-5]
+
+每个程序只编译一次, 所有线程共享同一个 Interpreter 与 Program. 先单线程运行
+每个程序得到期望的结果与输出, 再把 runs 次运行分给线程池, 任意一次运行的结果
+或输出与期望不同即以状态码 1 退出. 较小的 switch interval 让线程更频繁地切换,
+更容易暴露共享状态的问题
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from evaluator.interpreter import Interpreter, Program, ExecutionError
+from bench.runner import MODULES, WORKLOADS
+
+
+def run(program: Program) -> tuple[str, str]:
+    """运行一次, 返回结果与输出"""
+    stdout = io.StringIO()
+    try:
+        result = program.run_object(stdout=stdout).inspect()
+    except ExecutionError as e:
+        result = str(e)
+    return result, stdout.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.stress")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=64)
+    parser.add_argument("--switch-interval", type=float, default=1e-5,
+                        help="sys.setswitchinterval while running threads")
+    args = parser.parse_args()
+
+    interp = Interpreter()
+    programs: dict[str, Program] = {}
+    for file in sorted(os.listdir(WORKLOADS)):
+        if file.endswith(".monkey"):
+            with open(os.path.join(WORKLOADS, file)) as f:
+                programs[file.removesuffix(".monkey")] = interp.compile(f.read())
+    names = list(programs)
+    jobs = [names[i % len(names)] for i in range(args.runs)]
+
+    os.chdir(MODULES)
+    t0 = time.perf_counter()
+    expected = {name: run(program) for name, program in programs.items()}
+    sequential = (time.perf_counter() - t0) * len(jobs) / len(names)
+
+    # 深层递归的程序需要比默认更大的线程栈
+    threading.stack_size(64 << 20)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(args.switch_interval)
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(lambda name: run(programs[name]), jobs))
+    finally:
+        sys.setswitchinterval(interval)
+    parallel = time.perf_counter() - t0
+
+    failures = 0
+    for name, got in zip(jobs, results):
+        if got != expected[name]:
+            failures += 1
+            print(f"{name}: expected {expected[name]!r}, got {got!r}")
+    print(f"{len(jobs)} runs of {len(names)} programs on {args.threads} threads: "
+          f"{parallel:.2f}s (sequential estimate {sequential:.2f}s), {failures} mismatched")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
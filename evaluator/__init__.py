@@ -1,14 +1,32 @@
+import operator as op
+import os
+import threading
+from typing import Callable
 from lexer import Lexer
 from lexer.token import Position
 from parser import Parser
 from parser import ast
 from evaluator import objsys as obj
+from evaluator import extension, jit
+from evaluator.analysis import free_variables, is_leaf
 from evaluator.builtins import Builtins
-from evaluator.builtins import TRUE, FALSE, NULL
+from evaluator.builtins import TRUE, FALSE, NULL, BYTE_VALUES
 
 
 builtins = Builtins()
 
+FRAME_POOL_SIZE = 1024
+"""帧池中最多缓存的环境数量"""
+
+class Frames(threading.local):
+    """每个线程各自的帧池, 多个线程同时求值时不会取到同一个环境"""
+    def __init__(self):
+        self.pool: list[obj.Environment] = []
+        """叶子函数调用结束后归还的环境, 供之后的调用复用"""
+
+
+frames = Frames()
+
 
 def native_bool(v: bool):
     """根据输入条件返回 Monkey 原生布尔引用"""
@@ -72,9 +90,32 @@ def Eval(node: ast.Node, env: obj.Environment) -> obj.MonkeyObj:
             right = Eval(node.right, env)
             if is_error(right):
                 return right
+            spec = node.specialized
+            if spec:
+                result = spec(left, right)
+                if result is not None:
+                    return result
+                node.specialized = GENERIC
+            elif spec is None:
+                node.specialized = specialize_infix(left, node.operator, right)
             return eval_infix_expression(
                 left, node.operator, right, node.TokenPos())
         
+        case ast.LogicalExpression():
+            left = Eval(node.left, env)
+            if is_error(left):
+                return left
+            # 短路求值: 左侧已能决定结果时不再对右侧求值
+            if node.operator == '&&':
+                if not is_truthy(left):
+                    return FALSE
+            elif is_truthy(left):
+                return TRUE
+            right = Eval(node.right, env)
+            if is_error(right):
+                return right
+            return native_bool(is_truthy(right))
+
         case ast.IfExpression():
             condition = Eval(node.condition, env)
             if is_error(condition):
@@ -98,16 +139,35 @@ def Eval(node: ast.Node, env: obj.Environment) -> obj.MonkeyObj:
             env.set(node.name.value, val)
         
         case ast.Identifier():
-            val = env.get(node.value) or builtins.get(node.value)
-            if val:
+            val = env.get(node.value)
+            if val is None:
+                val = builtins.get(node.value)
+            if val is not None:
                 return val
             return obj.Error(node.TokenPos(), f"identifier not found: {node.value}")
         
         case ast.FunctionLiteral():
-            return obj.Function(node.parameters, node.body, env)
+            env.capture(free_variables(node))
+            return obj.Function(node.parameters, node.body, env, node.name)
         
         case ast.CallExpression():
             fn = Eval(node.func, env)
+            callee = node.specialized
+            if callee is not None and type(fn) is callee:
+                args = eval_expressions(node.arguments, env)
+                if len(args) == 1 and is_error(args[0]):
+                    return args[0]
+                if callee is obj.Function:
+                    return apply_function(fn, args)
+                if callee is obj.Python:
+                    return fn.func(node.TokenPos(), args)
+                return apply_struct(fn, args, node.TokenPos())
+            # 求值出错时不改变特化状态, 只在被调用对象的类型确实不同时退回通用路径
+            if type(fn) is not obj.Error:
+                if callee is None:
+                    node.specialized = specialize_call(fn)
+                elif callee:
+                    node.specialized = GENERIC
             match fn:
                 case obj.Error():
                     return fn
@@ -121,6 +181,11 @@ def Eval(node: ast.Node, env: obj.Environment) -> obj.MonkeyObj:
                     if len(args) == 1 and is_error(args[0]):
                         return args[0]
                     return fn.func(node.TokenPos(), args)
+                case obj.StructType():
+                    args = eval_expressions(node.arguments, env)
+                    if len(args) == 1 and is_error(args[0]):
+                        return args[0]
+                    return apply_struct(fn, args, node.TokenPos())
                 case _:
                     return obj.Error(
                         node.TokenPos(),
@@ -144,7 +209,15 @@ def Eval(node: ast.Node, env: obj.Environment) -> obj.MonkeyObj:
             idx = Eval(node.index, env)
             if is_error(idx):
                 return idx
-            
+
+            spec = node.specialized
+            if spec:
+                result = spec(left, idx)
+                if result is not None:
+                    return result
+                node.specialized = GENERIC
+            elif spec is None:
+                node.specialized = specialize_index(left, idx)
             return eval_index_expression(left, idx, node.TokenPos())
 
         case ast.HashLiteral():
@@ -163,22 +236,19 @@ def Eval(node: ast.Node, env: obj.Environment) -> obj.MonkeyObj:
         case ast.ImportStatement():
             return eval_import_statement(node, env)
 
+        case ast.WhileStatement():
+            return eval_while_statement(node, env)
+
+        case ast.ForStatement():
+            return eval_for_statement(node, env)
+
+        case ast.StructStatement():
+            struct = obj.StructType(node.name.value, [f.value for f in node.fields])
+            env.set(node.name.value, struct)
+
         case ast.VisitExpression():
             left = Eval(node.left, env)
-            match left:
-                case obj.Error():
-                    return left
-                case obj.Module():
-                    return (
-                        left.env.get(node.right.value)
-                        or obj.Error(
-                            node.TokenPos(),
-                            f"identifier not found at {left.name}: {node.right.value}"))
-                case _:
-                    return obj.Error(
-                        node.TokenPos(),
-                        f"visit operator not supported: {left.type().value}"
-                    )
+            return eval_visit_expression(node, left)
 
         case _:
             return obj.Error(node.TokenPos(), f"unsupport ast node: {node.__class__}")
@@ -220,6 +290,97 @@ def eval_block_statement(
     return result
 
 
+def is_loop_exit(obj_: obj.MonkeyObj) -> bool:
+    """循环体的结果是否需要结束循环并向外传递, 即 RETURN 或 ERROR 对象"""
+    if obj_ is None:
+        return False
+    rt = obj_.type()
+    return (
+        rt == obj.ObjectType.RETURN_VALUE_OBJ
+        or rt == obj.ObjectType.ERROR_OBJ
+    )
+
+
+def eval_while_statement(
+        stmt: ast.WhileStatement,
+        env: obj.Environment
+    ) -> obj.MonkeyObj:
+    """对 while 循环求值.
+    循环在一个独立的块作用域中执行, 条件表达式也在该作用域中求值,
+    因此循环体中的 let 会影响下一次的条件判断, 而不会影响外层作用域"""
+    loop_env = obj.Environment(env)
+    result: obj.MonkeyObj = NULL
+    while True:
+        condition = Eval(stmt.condition, loop_env)
+        if is_error(condition):
+            result = condition
+            break
+        if not is_truthy(condition):
+            break
+        evaluated = eval_block_statement(stmt.body.statements, loop_env)
+        if is_loop_exit(evaluated):
+            result = evaluated
+            break
+    loop_env.release()
+    return result
+
+
+def loop_items(
+        iterable: obj.MonkeyObj,
+        pos: Position
+    ):
+    """返回 for-in 循环遍历的元素序列, 对象不可遍历时返回 ERROR 对象"""
+    match iterable:
+        case obj.Array():
+            return iterable.elements
+        case obj.String():
+            return [obj.String(ch) for ch in iterable.value]
+        case obj.Hash():
+            return [pair.key for pair in iterable.pairs.values()]
+        case obj.Iterator():
+            return iterable
+        case obj.Bytes():
+            return map(BYTE_VALUES.__getitem__, iterable)
+        case _:
+            return obj.Error(
+                pos,
+                f"for-in not supported: {iterable.type().value} is not iterable")
+
+
+def eval_for_statement(
+        stmt: ast.ForStatement,
+        env: obj.Environment
+    ) -> obj.MonkeyObj:
+    """对 for-in 循环求值, 循环变量与循环体中的 let 都绑定在循环的块作用域中"""
+    iterable = Eval(stmt.iterable, env)
+    if is_error(iterable):
+        return iterable
+    items = loop_items(iterable, stmt.TokenPos())
+    if isinstance(items, obj.Error):
+        return items
+    loop_env = obj.Environment(env)
+    name = stmt.variable.value
+    result: obj.MonkeyObj = NULL
+    for item in items:
+        loop_env.set(name, item)
+        evaluated = eval_block_statement(stmt.body.statements, loop_env)
+        if is_loop_exit(evaluated):
+            result = evaluated
+            break
+    else:
+        if error := loop_error(iterable):
+            result = error
+    loop_env.release()
+    return result
+
+
+def loop_error(iterable: obj.MonkeyObj) -> obj.Error | None:
+    """返回惰性迭代器在遍历过程中产生的错误"""
+    if type(iterable) is obj.Iterator:
+        return iterable.error
+    return None
+
+
 def eval_pairs_expression(
         pairs: ast.PairsExpression,
         env: obj.Environment
@@ -241,6 +402,12 @@ def eval_import_statement(
     ) -> obj.MonkeyObj:
     module_name = stmt.module
     module_path = f"{module_name}.monkey"
+    if not os.path.isfile(module_path):
+        module = extension.load(module_name, stmt.TokenPos())
+        if is_error(module):
+            return module
+        env.set(module_name, module)
+        return NULL
     module_env = obj.Environment()
     try:
         with open(module_path, 'r') as module:
@@ -254,7 +421,7 @@ def eval_import_statement(
             load = Eval(program, module_env)
             if is_error(load):
                 return load
-    except:
+    except Exception:
         return obj.Error(
             stmt.TokenPos(),
             f"import error, can not load '{stmt.module}'")
@@ -345,15 +512,37 @@ def eval_infix_expression_for_integer(
         case '*':
             return obj.Integer(left_v * right_v)
         case '/':
+            if right_v == 0:
+                return obj.Error(pos, "division by zero")
             return obj.Integer(left_v // right_v)
+        case '%':
+            if right_v == 0:
+                return obj.Error(pos, "modulo by zero")
+            return obj.Integer(left_v % right_v)
         case '>':
             return native_bool(left_v > right_v)
         case '<':
             return native_bool(left_v < right_v)
+        case '>=':
+            return native_bool(left_v >= right_v)
+        case '<=':
+            return native_bool(left_v <= right_v)
         case '==':
             return native_bool(left_v == right_v)
         case '!=':
             return native_bool(left_v != right_v)
+        case '&':
+            return obj.Integer(left_v & right_v)
+        case '|':
+            return obj.Integer(left_v | right_v)
+        case '^':
+            return obj.Integer(left_v ^ right_v)
+        case '<<' | '>>':
+            if right_v < 0:
+                return obj.Error(pos, f"negative shift count: {right_v}")
+            if operator == '<<':
+                return obj.Integer(left_v << right_v)
+            return obj.Integer(left_v >> right_v)
         case _:
             return obj.Error(pos, f"unknown operator: INTEGER unsupport operator '{operator}'")
 
@@ -383,7 +572,7 @@ def eval_infix_expression_for_string(
     """对字符串支持的中缀表达式求值"""
     match operator:
         case '+':
-            return obj.String(left.value + right.value)
+            return obj.String.concat(left, right)
         case _:
             return obj.Error(pos, f"unknown operator: STRING unsupport operator '{operator}'")
 
@@ -407,15 +596,91 @@ def apply_function(
         func: obj.Function,
         args: list[obj.MonkeyObj]
     ) -> obj.MonkeyObj:
-    """执行函数"""
-    extend_env = obj.Environment(func.env)
+    """执行函数, 调用次数超过阈值的函数会被编译为 python 函数执行"""
+    body = func.body
+    compiled = body.compiled
+    if compiled:
+        return compiled(func.env, args)
+    if compiled is None and jit.enabled:
+        func.calls += 1
+        if func.calls >= jit.THRESHOLD:
+            body.compiled = jit.compile_function(func, globals()) or GENERIC
+    # 叶子函数的环境不会逃逸, 从帧池中取用并在调用结束后归还
+    leaf = body.leaf
+    if leaf is None:
+        leaf = is_leaf(body)
+    frame_pool = frames.pool
+    if leaf and frame_pool:
+        extend_env = frame_pool.pop()
+        extend_env.outer = func.env
+    else:
+        extend_env = obj.Environment(func.env)
     for i in range(len(func.parameters)):
         param = func.parameters[i].value
         extend_env.set(param, args[i])
-    evaluated = Eval(func.body, extend_env)
+    evaluated = Eval(body, extend_env)
+    if leaf:
+        if len(frame_pool) < FRAME_POOL_SIZE:
+            extend_env.store.clear()
+            extend_env.outer = None
+            frame_pool.append(extend_env)
+    else:
+        extend_env.release()
     return unwrap(evaluated)
 
 
+def apply_struct(
+        struct: obj.MonkeyObj,
+        args: list[obj.MonkeyObj],
+        pos: Position
+    ) -> obj.MonkeyObj:
+    """调用结构体类型, 按字段顺序由实参创建记录"""
+    if type(struct) is not obj.StructType:
+        return obj.Error(pos, f"not a function: {struct.type().value} is not callable")
+    if len(args) != len(struct.fields):
+        return obj.Error(
+            pos,
+            f"wrong number of arguments to struct {struct.name}. got={len(args)}, want={len(struct.fields)}"
+        )
+    return obj.Record(struct, args)
+
+
+def eval_visit_expression(
+        node: ast.VisitExpression,
+        left: obj.MonkeyObj
+    ) -> obj.MonkeyObj:
+    """对属性访问表达式求值.
+    记录的字段下标在第一次访问时解析并缓存在节点上, 之后遇到同一结构体的记录
+    直接按下标取值"""
+    spec = node.specialized
+    if spec is not None and type(left) is obj.Record and left.struct is spec[0]:
+        return left.values[spec[1]]
+    name = node.right.value
+    match left:
+        case obj.Error():
+            return left
+        case obj.Record():
+            slot = left.struct.slots.get(name)
+            if slot is None:
+                return obj.Error(
+                    node.TokenPos(),
+                    f"struct {left.struct.name} has no field: {name}")
+            node.specialized = (left.struct, slot)
+            return left.values[slot]
+        case obj.Module():
+            val = left.env.get(name)
+            if val is not None:
+                return val
+            return obj.Error(
+                node.TokenPos(),
+                f"identifier not found at {left.name}: {name}")
+        case _:
+            return obj.Error(
+                node.TokenPos(),
+                f"visit operator not supported: {left.type().value}"
+            )
+
+
 def eval_index_expression(
         left: obj.MonkeyObj,
         index: obj.MonkeyObj,
@@ -426,11 +691,26 @@ def eval_index_expression(
         case obj.Array():
             if isinstance(index, obj.Integer):
                 try: return left.elements[index.value]
-                except: return NULL
+                except IndexError: return NULL
             return obj.Error(
                 pos,
                 f"array index must be Integer. not {index.type().value}"
             )
+        case obj.String():
+            if isinstance(index, obj.Integer):
+                try: return obj.String(left.value[index.value])
+                except IndexError: return NULL
+            return obj.Error(
+                pos,
+                f"string index must be Integer. not {index.type().value}"
+            )
+        case obj.Bytes():
+            if isinstance(index, obj.Integer):
+                return bytes_index(left, index)
+            return obj.Error(
+                pos,
+                f"bytes index must be Integer. not {index.type().value}"
+            )
         case obj.Hash():
             if not isinstance(index, obj.Hashable):
                 return obj.Error(f"{index.type()} is not hashable")
@@ -443,3 +723,128 @@ def eval_index_expression(
                 pos,
                 f"index operator not supported: {left.type().value}"
             )
+
+
+# ========== quickening ==========
+#
+# 节点第一次求值时根据观察到的操作数类型选择一个特化实现, 缓存在节点的
+# specialized 属性上, 之后的求值直接走特化实现.
+# 特化实现自带类型守卫, 守卫失败时返回 None, 节点随即退化为 GENERIC,
+# 之后始终走通用路径 (去优化).
+
+GENERIC = False
+"""已去优化的节点标记, 该节点不再尝试特化"""
+
+specialization = Callable[[obj.MonkeyObj, obj.MonkeyObj], obj.MonkeyObj | None]
+"""特化实现规范, 守卫失败时返回 None"""
+
+
+def integer_arith(fn: Callable[[int, int], int]) -> specialization:
+    """生成整型算术运算的特化实现"""
+    def spec(left: obj.MonkeyObj, right: obj.MonkeyObj) -> obj.MonkeyObj | None:
+        if type(left) is obj.Integer and type(right) is obj.Integer:
+            return obj.Integer(fn(left.value, right.value))
+        return None
+    return spec
+
+
+def integer_divide(fn: Callable[[int, int], int]) -> specialization:
+    """生成整除与取模的特化实现, 除数为 0 时交给通用路径报错"""
+    def spec(left: obj.MonkeyObj, right: obj.MonkeyObj) -> obj.MonkeyObj | None:
+        if type(left) is obj.Integer and type(right) is obj.Integer and right.value != 0:
+            return obj.Integer(fn(left.value, right.value))
+        return None
+    return spec
+
+
+def integer_compare(fn: Callable[[int, int], bool]) -> specialization:
+    """生成整型比较运算的特化实现"""
+    def spec(left: obj.MonkeyObj, right: obj.MonkeyObj) -> obj.MonkeyObj | None:
+        if type(left) is obj.Integer and type(right) is obj.Integer:
+            return TRUE if fn(left.value, right.value) else FALSE
+        return None
+    return spec
+
+
+def string_concat(left: obj.MonkeyObj, right: obj.MonkeyObj) -> obj.MonkeyObj | None:
+    """字符串拼接的特化实现"""
+    if type(left) is obj.String and type(right) is obj.String:
+        return obj.String.concat(left, right)
+    return None
+
+
+def array_index(left: obj.MonkeyObj, index: obj.MonkeyObj) -> obj.MonkeyObj | None:
+    """数组取下标的特化实现"""
+    if type(left) is obj.Array and type(index) is obj.Integer:
+        try: return left.elements[index.value]
+        except IndexError: return NULL
+    return None
+
+
+def bytes_index(left: obj.MonkeyObj, index: obj.MonkeyObj) -> obj.MonkeyObj | None:
+    """字节串取下标的特化实现, 越界时返回 NULL"""
+    if type(left) is obj.Bytes and type(index) is obj.Integer:
+        i = index.value
+        size = left.stop - left.start
+        if i < 0:
+            i += size
+        if 0 <= i < size:
+            return BYTE_VALUES[left.base[left.start + i]]
+        return NULL
+    return None
+
+
+integer_specs: dict[str, specialization] = {
+    '+':  integer_arith(op.add),
+    '-':  integer_arith(op.sub),
+    '*':  integer_arith(op.mul),
+    '/':  integer_divide(op.floordiv),
+    '%':  integer_divide(op.mod),
+    '&':  integer_arith(op.and_),
+    '|':  integer_arith(op.or_),
+    '^':  integer_arith(op.xor),
+    '>':  integer_compare(op.gt),
+    '<':  integer_compare(op.lt),
+    '>=': integer_compare(op.ge),
+    '<=': integer_compare(op.le),
+    '==': integer_compare(op.eq),
+    '!=': integer_compare(op.ne),
+}
+"""整型中缀运算符对应的特化实现, 移位运算需要检查位数, 始终走通用路径"""
+
+
+def specialize_infix(
+        left: obj.MonkeyObj,
+        operator: str,
+        right: obj.MonkeyObj
+    ) -> specialization | bool:
+    """根据操作数类型为中缀表达式选择特化实现"""
+    if type(left) is obj.Integer and type(right) is obj.Integer:
+        return integer_specs.get(operator, GENERIC)
+    if (
+        type(left) is obj.String
+        and type(right) is obj.String
+        and operator == '+'
+        ):
+        return string_concat
+    return GENERIC
+
+
+def specialize_index(
+        left: obj.MonkeyObj,
+        index: obj.MonkeyObj
+    ) -> specialization | bool:
+    """根据操作数类型为取下标表达式选择特化实现"""
+    if type(left) is obj.Array and type(index) is obj.Integer:
+        return array_index
+    if type(left) is obj.Bytes and type(index) is obj.Integer:
+        return bytes_index
+    return GENERIC
+
+
+def specialize_call(fn: obj.MonkeyObj) -> type | bool:
+    """根据被调用对象的类型为调用表达式选择特化实现,
+    调用表达式的特化实现即被调用对象的类型本身"""
+    if type(fn) is obj.Function or type(fn) is obj.Python or type(fn) is obj.StructType:
+        return type(fn)
+    return GENERIC
@@ -0,0 +1,89 @@
+from parser import ast
+
+
+def children(node: ast.Node) -> list[ast.Node]:
+    """返回 AST 节点的直接子节点"""
+    match node:
+        case ast.Program() | ast.BlockStatement():
+            return node.statements
+        case ast.ExpressionStatement():
+            return [node.expression]
+        case ast.LetStatement():
+            return [node.value]
+        case ast.ReturnStatement():
+            return [node.return_value]
+        case ast.PrefixExpression():
+            return [node.right]
+        case ast.InfixExpression() | ast.LogicalExpression():
+            return [node.left, node.right]
+        case ast.IfExpression():
+            if node.alternative:
+                return [node.condition, node.consequence, node.alternative]
+            return [node.condition, node.consequence]
+        case ast.FunctionLiteral():
+            return [node.body]
+        case ast.CallExpression():
+            return [node.func, *node.arguments]
+        case ast.ArrayLiteral():
+            return node.elements
+        case ast.IndexExpression():
+            return [node.left, node.index]
+        case ast.HashLiteral():
+            return node.pairs
+        case ast.PairsExpression():
+            return [node.key, node.value]
+        case ast.WhileStatement():
+            return [node.condition, node.body]
+        case ast.ForStatement():
+            return [node.iterable, node.body]
+        case ast.VisitExpression():
+            # 右侧的标识符是属性名, 不是变量引用
+            return [node.left]
+        case _:
+            return []
+
+
+def free_variables(literal: ast.FunctionLiteral) -> frozenset[str]:
+    """计算函数字面量的自由变量, 即函数体 (包括嵌套的函数字面量) 中
+    引用到的、不是该函数参数的名字.
+
+    函数体中 let 绑定的名字同样被计入, 因为在 let 执行之前对同名变量的引用
+    会落到外层作用域, 所以这里得到的是一个保守的上界"""
+    cached = literal.free
+    if cached is not None:
+        return cached
+    names: set[str] = set()
+    stack: list[ast.Node] = [literal.body]
+    while stack:
+        node = stack.pop()
+        match node:
+            case ast.Identifier():
+                names.add(node.value)
+            case ast.FunctionLiteral():
+                names |= free_variables(node)
+            case None:
+                pass
+            case _:
+                stack.extend(children(node))
+    free = frozenset(names - {p.value for p in literal.parameters})
+    literal.free = free
+    return free
+
+
+def is_leaf(body: ast.BlockStatement) -> bool:
+    """判断函数体是否不含嵌套的函数字面量.
+    这样的函数在调用时创建的环境不会被任何闭包捕获, 调用结束后即可复用"""
+    cached = body.leaf
+    if cached is not None:
+        return cached
+    leaf = True
+    stack: list[ast.Node] = [body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.FunctionLiteral):
+            leaf = False
+            break
+        if node is not None:
+            stack.extend(children(node))
+    body.leaf = leaf
+    return leaf
@@ -0,0 +1,121 @@
+"""在进程池中批量运行 Monkey 程序
+
+    python main.py --batch jobs/ --workers 8 --timeout 10 --summary out.jsonl
+    python main.py --batch "jobs/**/*.monkey"
+
+参数为目录时运行其中所有的 .monkey 文件, 否则作为 glob 模式. 每个工作进程只
+导入一次解释器, 之后依次运行分配给它的程序, 避免每个程序都要启动一次 python.
+每个程序在新的环境中运行, 输出 (puts 以及最后一个表达式的值, 与
+`python main.py job.monkey` 的输出相同) 与错误分别记录.
+
+超时依靠工作进程中的 SIGALRM 实现, 不支持该信号的平台上不限制运行时间.
+summary 文件的每一行是一个程序的 JSON 记录:
+
+    {"script": ..., "status": "ok" | "error" | "timeout" | "exit",
+     "elapsed_ms": ..., "output": ..., "error": ...}
+"""
+import glob
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from evaluator import jit
+from evaluator.builtins import NULL
+from evaluator.interpreter import CompileError, ExecutionError, Interpreter
+
+
+class Timeout(BaseException):
+    """程序运行超时, 不继承 Exception, 以免被求值器中捕获 Exception 的代码当作普通错误处理"""
+
+
+def on_alarm(signum, frame):
+    raise Timeout()
+
+
+def init_worker(no_jit: bool) -> None:
+    """工作进程的初始化, 解释器已随本模块导入"""
+    if no_jit:
+        jit.enabled = False
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, on_alarm)
+
+
+def run_job(path: str, timeout: float | None) -> dict:
+    """运行一个程序, 返回它的记录"""
+    record = {"script": path, "status": "ok", "elapsed_ms": 0.0, "output": "", "error": None}
+    stdout = io.StringIO()
+    alarm = timeout and hasattr(signal, "setitimer")
+    start = time.perf_counter()
+    try:
+        with open(path) as f:
+            code = f.read()
+        program = Interpreter().compile(code)
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result = program.run_object(stdout=stdout)
+        finally:
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        if result != NULL:
+            stdout.write(result.inspect() + "\n")
+    except CompileError as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    except ExecutionError as e:
+        stdout.write(str(e) + "\n")
+        record["status"] = "error"
+        record["error"] = str(e)
+    except Timeout:
+        record["status"] = "timeout"
+        record["error"] = f"timed out after {timeout}s"
+    except SystemExit:
+        record["status"] = "exit"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    record["output"] = stdout.getvalue()
+    return record
+
+
+def find_scripts(pattern: str) -> list[str]:
+    """目录中的所有 .monkey 文件, 或者匹配 glob 模式的文件"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.monkey")
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+
+def run_batch(
+        pattern: str,
+        workers: int = None,
+        timeout: float = None,
+        summary: str = "batch-summary.jsonl",
+        no_jit: bool = False
+    ) -> int:
+    """运行所有程序并写入 summary, 返回进程的退出状态码"""
+    scripts = find_scripts(pattern)
+    if not scripts:
+        print(f"no scripts match '{pattern}'", file=sys.stderr)
+        return 1
+    workers = workers or os.cpu_count() or 1
+    # 程序通常很小, 成块分发以减少进程间通信的次数
+    chunksize = max(1, len(scripts) // (workers * 8))
+    counts: dict[str, int] = {}
+    start = time.perf_counter()
+    with open(summary, "w") as out, ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(no_jit,)) as pool:
+        jobs = pool.map(run_job, scripts, [timeout] * len(scripts), chunksize=chunksize)
+        for record in jobs:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+    elapsed = time.perf_counter() - start
+    statuses = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"{len(scripts)} scripts on {workers} workers in {elapsed:.2f}s "
+          f"({len(scripts) / elapsed:.1f}/s): {statuses}, summary written to {summary}",
+          file=sys.stderr)
+    failed = counts.get("error", 0) + counts.get("timeout", 0)
+    return 1 if failed else 0
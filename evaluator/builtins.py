@@ -1,7 +1,20 @@
-from typing import Callable
+import atexit
+import contextlib
+import csv
+import json
+import mmap
+import re
+import struct
+import sys
+import threading
+import weakref
+from functools import lru_cache
+from string import Formatter
+from typing import IO, Callable, Iterable
 from lexer.token import Position
 from parser import ast
 from evaluator import objsys as obj
+from evaluator.memstats import tracker
 
 
 pyfunc_args = list[obj.MonkeyObj]
@@ -11,6 +24,38 @@ NULL = obj.Null()
 TRUE = obj.Boolean(True)
 FALSE = obj.Boolean(False)
 
+STRING = obj.ObjectType.STRING_OBJ
+INTEGER = obj.ObjectType.INTEGER_OBJ
+BYTES = obj.ObjectType.BYTES_OBJ
+
+BYTE_VALUES = [obj.Integer(i) for i in range(256)]
+"""字节值对应的 INTEGER 对象, 取字节时复用, 不再为每个字节创建对象"""
+
+
+def check_args(
+        pos: Position,
+        name: str,
+        args: pyfunc_args,
+        want: list[obj.ObjectType | None],
+        optional: int = 0
+    ) -> obj.Error | None:
+    """检查内置函数的参数个数与类型, 不符合要求时返回 ERROR 对象.
+    want 中为 None 的位置不检查类型, 末尾的 optional 个参数可以省略"""
+    least = len(want) - optional
+    if not least <= len(args) <= len(want):
+        expected = f"{least}..{len(want)}" if optional else f"{len(want)}"
+        return obj.Error(
+            pos,
+            f"wrong number of arguments. got={len(args)}, want={expected}"
+        )
+    for i, (arg, tt) in enumerate(zip(args, want)):
+        if tt is not None and arg.type() != tt:
+            return obj.Error(
+                pos,
+                f"argument {i + 1} to `{name}` must be {tt.value}. got {arg.type().value}"
+            )
+    return None
+
 
 def len_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
     if len(args) != 1:
@@ -20,9 +65,11 @@ def len_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
         )
     match arg := args[0]:
         case obj.String():
-            return obj.Integer(len(arg.value))
+            return obj.Integer(arg.length())
         case obj.Array():
             return obj.Integer(len(arg.elements))
+        case obj.Bytes():
+            return obj.Integer(len(arg))
         case _:
             return obj.Error(
                 pos,
@@ -30,13 +77,76 @@ def len_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
             )
 
 
+IO_BUFFER_SIZE = 1 << 20
+"""文件写入以及缓冲输出模式下标准输出的缓冲区大小"""
+
+
+class Output():
+    """标准输出, puts 与 REPL 的输出都写到这里.
+    默认直接写到 sys.stdout, 调用 buffered 后改为写到一个按块缓冲的流,
+    在 flush、exit() 以及进程退出时才真正输出.
+    redirect 只改变当前线程的输出, 多个线程可以各自运行程序而不混淆输出"""
+    def __init__(self):
+        self.stream: IO = None
+        self.local = threading.local()
+
+    def buffered(self, size: int = IO_BUFFER_SIZE) -> None:
+        sys.stdout.flush()
+        self.stream = open(
+            sys.stdout.fileno(), "w",
+            buffering=size,
+            encoding=sys.stdout.encoding,
+            errors=sys.stdout.errors,
+            closefd=False,
+        )
+
+    def current(self) -> IO:
+        return getattr(self.local, "stream", None) or self.stream or sys.stdout
+
+    @contextlib.contextmanager
+    def redirect(self, stream: IO):
+        """在 with 语句中把当前线程的输出写到 stream"""
+        previous = getattr(self.local, "stream", None)
+        self.local.stream = stream
+        try:
+            yield stream
+        finally:
+            self.local.stream = previous
+
+    def write(self, text: str) -> None:
+        self.current().write(text)
+
+    def flush(self) -> None:
+        self.current().flush()
+
+
+output = Output()
+
+open_files: weakref.WeakSet[IO] = weakref.WeakSet()
+"""open 打开的尚未回收的文件, 进程退出时统一刷新"""
+
+
+@atexit.register
+def flush_all() -> None:
+    """刷新标准输出以及所有打开的文件"""
+    for file in list(open_files):
+        if not file.closed:
+            file.flush()
+    try:
+        output.flush()
+    except BrokenPipeError:
+        # 标准输出的读端已经关闭, 例如输出被管道传给了 head
+        pass
+
+
 def exit_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    flush_all()
     exit()
     return obj.String("bye")
 
 
 def puts(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
-    print(*[arg.readable() for arg in args])
+    output.write(" ".join([arg.readable() for arg in args]) + "\n")
     return NULL
 
 
@@ -94,6 +204,636 @@ def push(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
     return obj.Array(array.elements + [element])
 
 
+def join(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) != 2:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want=2")
+
+    if args[0].type() != obj.ObjectType.ARRAY_OBJ:
+        return obj.Error(pos, f"argument to `join` must be ARRAY. got {args[0].type().value}")
+
+    if args[1].type() != obj.ObjectType.STRING_OBJ:
+        return obj.Error(pos, f"separator of `join` must be STRING. got {args[1].type().value}")
+
+    array: obj.Array = args[0]
+    return obj.String(args[1].value.join([e.readable() for e in array.elements]))
+
+
+def string_builder(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) != 0:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want=0")
+    return obj.StringBuilder()
+
+
+def append(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) < 1:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want>=1")
+
+    if args[0].type() != obj.ObjectType.STRING_BUILDER_OBJ:
+        return obj.Error(pos, f"argument to `append` must be STRING_BUILDER. got {args[0].type().value}")
+
+    builder: obj.StringBuilder = args[0]
+    builder.parts.extend([arg.readable() for arg in args[1:]])
+    return builder
+
+
+def build(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) != 1:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want=1")
+
+    if args[0].type() != obj.ObjectType.STRING_BUILDER_OBJ:
+        return obj.Error(pos, f"argument to `build` must be STRING_BUILDER. got {args[0].type().value}")
+
+    builder: obj.StringBuilder = args[0]
+    return obj.String(''.join(builder.parts))
+
+
+# ========== string ==========
+
+def split(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "split", args, [STRING, STRING], optional=1):
+        return err
+    if len(args) == 1:
+        return obj.Array([obj.String(p) for p in args[0].value.split()])
+    sep = args[1].value
+    if sep == '':
+        return obj.Error(pos, "separator of `split` must not be empty")
+    return obj.Array([obj.String(p) for p in args[0].value.split(sep)])
+
+
+def substr(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "substr", args, [STRING, INTEGER, INTEGER], optional=1):
+        return err
+    value = args[0].value
+    start = args[1].value
+    if start < 0:
+        start = max(start + len(value), 0)
+    if len(args) == 2:
+        return obj.String(value[start:])
+    length = args[2].value
+    if length < 0:
+        return obj.Error(pos, f"length of `substr` must not be negative. got {length}")
+    return obj.String(value[start:start + length])
+
+
+def find(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if args and args[0].type() == BYTES:
+        return bytes_find(pos, args)
+    if err := check_args(pos, "find", args, [STRING, STRING, INTEGER], optional=1):
+        return err
+    start = args[2].value if len(args) == 3 else 0
+    return obj.Integer(args[0].value.find(args[1].value, start))
+
+
+def replace(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "replace", args, [STRING, STRING, STRING, INTEGER], optional=1):
+        return err
+    count = args[3].value if len(args) == 4 else -1
+    return obj.String(args[0].value.replace(args[1].value, args[2].value, count))
+
+
+def upper(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "upper", args, [STRING]):
+        return err
+    return obj.String(args[0].value.upper())
+
+
+def lower(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "lower", args, [STRING]):
+        return err
+    return obj.String(args[0].value.lower())
+
+
+def trim(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "trim", args, [STRING, STRING], optional=1):
+        return err
+    if len(args) == 2:
+        return obj.String(args[0].value.strip(args[1].value))
+    return obj.String(args[0].value.strip())
+
+
+def starts_with(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "starts_with", args, [STRING, STRING]):
+        return err
+    return TRUE if args[0].value.startswith(args[1].value) else FALSE
+
+
+def ends_with(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "ends_with", args, [STRING, STRING]):
+        return err
+    return TRUE if args[0].value.endswith(args[1].value) else FALSE
+
+
+def chars(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "chars", args, [STRING]):
+        return err
+    return obj.Array([obj.String(ch) for ch in args[0].value])
+
+
+def unsupported_field(template: str) -> str | None:
+    """模板中第一个不是位置参数的字段, 包括嵌套在格式说明中的字段"""
+    for _, field, spec, _ in Formatter().parse(template):
+        if field and not field.isdigit():
+            return field
+        if spec and (field := unsupported_field(spec)) is not None:
+            return field
+    return None
+
+
+def format_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) < 1:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want>=1")
+    if args[0].type() != STRING:
+        return obj.Error(pos, f"argument 1 to `format` must be STRING. got {args[0].type().value}")
+    template = args[0].value
+    try:
+        # 只允许位置参数, 不允许 {0.attr} 或 {0[key]} 形式的字段
+        if (field := unsupported_field(template)) is not None:
+            return obj.Error(pos, f"format error: unsupported field '{{{field}}}'")
+        return obj.String(template.format(*[arg.readable() for arg in args[1:]]))
+    except (IndexError, KeyError, ValueError) as e:
+        return obj.Error(pos, f"format error: {e}")
+
+
+# ========== regex ==========
+
+REGEX_CACHE_SIZE = 512
+"""编译后的正则表达式缓存的容量"""
+
+regex_flags: dict[str, re.RegexFlag] = {
+    'i': re.IGNORECASE,
+    'm': re.MULTILINE,
+    's': re.DOTALL,
+    'x': re.VERBOSE,
+    'a': re.ASCII,
+}
+"""正则表达式标志字符到 python re 标志的映射"""
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_pattern(pattern: str, flags: int) -> re.Pattern:
+    """编译正则表达式, 以 (pattern, flags) 为键缓存, 每个模式在进程内只编译一次"""
+    return re.compile(pattern, flags)
+
+
+def regex_cache_stats() -> dict[str, int]:
+    """正则表达式缓存的命中统计"""
+    info = compile_pattern.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+def new_hash(items: dict[str, obj.MonkeyObj]) -> obj.Hash:
+    """由 python 字典构造以字符串为键的哈希表"""
+    pairs = {}
+    for k, v in items.items():
+        key = obj.String(k)
+        pairs[key.hashkey()] = obj.HashPair(key, v)
+    return obj.Hash(pairs)
+
+
+def regex(
+        pos: Position,
+        name: str,
+        args: pyfunc_args,
+        want: list[obj.ObjectType]
+    ) -> re.Pattern | obj.Error:
+    """检查正则内置函数的参数并返回编译好的模式,
+    参数依次为 want 中的必选参数与一个可选的标志字符串, 如 "im" """
+    if err := check_args(pos, name, args, want + [STRING], optional=1):
+        return err
+    flags = 0
+    if len(args) > len(want):
+        for ch in args[-1].value:
+            if ch not in regex_flags:
+                return obj.Error(pos, f"unknown regex flag '{ch}' for `{name}`")
+            flags |= regex_flags[ch]
+    try:
+        return compile_pattern(args[0].value, flags)
+    except re.error as e:
+        return obj.Error(pos, f"invalid regex for `{name}`: {e}")
+
+
+def group_value(group: str | None) -> obj.MonkeyObj:
+    """未参与匹配的分组对应 null"""
+    return NULL if group is None else obj.String(group)
+
+
+def re_match(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    pattern = regex(pos, "re_match", args, [STRING, STRING])
+    if isinstance(pattern, obj.Error):
+        return pattern
+    m = pattern.search(args[1].value)
+    if m is None:
+        return NULL
+    return obj.Array([obj.String(m.group(0))] + [group_value(g) for g in m.groups()])
+
+
+def re_find_all(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    pattern = regex(pos, "re_find_all", args, [STRING, STRING])
+    if isinstance(pattern, obj.Error):
+        return pattern
+    matches = pattern.finditer(args[1].value)
+    if pattern.groups == 0:
+        return obj.Array([obj.String(m.group(0)) for m in matches])
+    return obj.Array([
+        obj.Array([group_value(g) for g in m.groups()]) for m in matches
+    ])
+
+
+def re_replace(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    pattern = regex(pos, "re_replace", args, [STRING, STRING, STRING])
+    if isinstance(pattern, obj.Error):
+        return pattern
+    try:
+        return obj.String(pattern.sub(args[2].value, args[1].value))
+    except re.error as e:
+        return obj.Error(pos, f"invalid replacement for `re_replace`: {e}")
+
+
+def re_split(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    pattern = regex(pos, "re_split", args, [STRING, STRING])
+    if isinstance(pattern, obj.Error):
+        return pattern
+    return obj.Array([group_value(p) for p in pattern.split(args[1].value)])
+
+
+def re_stats(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "re_stats", args, []):
+        return err
+    return new_hash({k: obj.Integer(v) for k, v in regex_cache_stats().items()})
+
+
+# ========== io ==========
+
+file_modes = {"r", "w", "a"}
+
+
+def open_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "open", args, [STRING, STRING], optional=1):
+        return err
+    path = args[0].value
+    mode = args[1].value if len(args) > 1 else "r"
+    if mode not in file_modes:
+        return obj.Error(pos, f"unknown file mode '{mode}' for `open`")
+    try:
+        file = open(path, mode, buffering=IO_BUFFER_SIZE, encoding="utf-8")
+    except OSError as e:
+        return obj.Error(pos, f"can not open '{path}': {e.strerror}")
+    open_files.add(file)
+    return obj.File(path, mode, file)
+
+
+def check_file(
+        pos: Position,
+        name: str,
+        arg: obj.MonkeyObj
+    ) -> IO | obj.Error:
+    """返回 FILE 对象中打开的 python 文件"""
+    if arg.type() != obj.ObjectType.FILE_OBJ:
+        return obj.Error(pos, f"argument 1 to `{name}` must be FILE. got {arg.type().value}")
+    if arg.file.closed:
+        return obj.Error(pos, f"`{name}` on closed file '{arg.path}'")
+    return arg.file
+
+
+def source_file(
+        pos: Position,
+        name: str,
+        args: pyfunc_args,
+        newline: str = None
+    ) -> tuple[IO, bool] | obj.Error:
+    """返回读取类内置函数的数据来源, 第一个参数可以是 FILE 对象或者文件路径.
+    第二个返回值表示文件是否由该函数打开, 需要在读完后关闭"""
+    arg = args[0]
+    match arg:
+        case obj.File():
+            file = check_file(pos, name, arg)
+            return file if isinstance(file, obj.Error) else (file, False)
+        case obj.String():
+            pass
+        case _:
+            return obj.Error(pos, f"argument 1 to `{name}` must be FILE or STRING. got {arg.type().value}")
+    try:
+        file = open(arg.value, buffering=IO_BUFFER_SIZE, encoding="utf-8", newline=newline)
+    except OSError as e:
+        return obj.Error(pos, f"can not open '{arg.value}': {e.strerror}")
+    return file, True
+
+
+def stream(
+        pos: Position,
+        file: IO,
+        owned: bool,
+        records: Iterable[obj.MonkeyObj]
+    ) -> Iterable[obj.MonkeyObj]:
+    """逐个产生 records 中的对象, 读取出错时产生 ERROR 对象并结束"""
+    try:
+        yield from records
+    except (OSError, ValueError, csv.Error) as e:
+        yield obj.Error(pos, f"read error: {e}")
+    finally:
+        if owned:
+            file.close()
+
+
+def read_lines(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "read_lines", args, [None]):
+        return err
+    source = source_file(pos, "read_lines", args)
+    if isinstance(source, obj.Error):
+        return source
+    file, owned = source
+    lines = (
+        obj.String(line[:-1] if line.endswith("\n") else line)
+        for line in file
+    )
+    return obj.Iterator("read_lines", stream(pos, file, owned, lines))
+
+
+def read_csv(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "read_csv", args, [None, STRING], optional=1):
+        return err
+    delimiter = args[1].value if len(args) > 1 else ","
+    if len(delimiter) != 1:
+        return obj.Error(pos, "delimiter to `read_csv` must be a single character")
+    source = source_file(pos, "read_csv", args[:1], newline="")
+    if isinstance(source, obj.Error):
+        return source
+    file, owned = source
+    rows = (
+        obj.Array([obj.String(field) for field in row])
+        for row in csv.reader(file, delimiter=delimiter)
+    )
+    return obj.Iterator("read_csv", stream(pos, file, owned, rows))
+
+
+def write(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) < 1:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want=1..")
+    file = check_file(pos, "write", args[0])
+    if isinstance(file, obj.Error):
+        return file
+    try:
+        file.write(" ".join([arg.readable() for arg in args[1:]]) + "\n")
+    except (OSError, ValueError) as e:
+        return obj.Error(pos, f"write error: {e}")
+    return NULL
+
+
+def flush(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if len(args) > 1:
+        return obj.Error(pos, f"wrong number of arguments. got={len(args)}, want=0..1")
+    if not args:
+        output.flush()
+        return NULL
+    file = check_file(pos, "flush", args[0])
+    if isinstance(file, obj.Error):
+        return file
+    try:
+        file.flush()
+    except OSError as e:
+        return obj.Error(pos, f"write error: {e}")
+    return NULL
+
+
+def close(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "close", args, [obj.ObjectType.FILE_OBJ]):
+        return err
+    try:
+        args[0].file.close()
+    except OSError as e:
+        return obj.Error(pos, f"write error: {e}")
+    return NULL
+
+
+# ========== bytes ==========
+
+def mmap_file(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "mmap_file", args, [STRING]):
+        return err
+    path = args[0].value
+    try:
+        with open(path, "rb") as file:
+            if file.seek(0, 2) == 0:
+                # 空文件不能被映射
+                return obj.Bytes(b'')
+            return obj.Bytes(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except OSError as e:
+        return obj.Error(pos, f"can not map '{path}': {e.strerror}")
+
+
+def encode(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "encode", args, [STRING, STRING], optional=1):
+        return err
+    encoding = args[1].value if len(args) > 1 else "utf-8"
+    try:
+        return obj.Bytes(args[0].value.encode(encoding))
+    except (LookupError, UnicodeError) as e:
+        return obj.Error(pos, f"`encode` failed: {e}")
+
+
+def decode(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "decode", args, [BYTES, STRING], optional=1):
+        return err
+    encoding = args[1].value if len(args) > 1 else "utf-8"
+    try:
+        return obj.String(args[0].tobytes().decode(encoding))
+    except (LookupError, UnicodeError) as e:
+        return obj.Error(pos, f"`decode` failed: {e}")
+
+
+def slice_(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "slice", args, [BYTES, INTEGER, INTEGER], optional=1):
+        return err
+    data: obj.Bytes = args[0]
+    stop = args[2].value if len(args) > 2 else len(data)
+    return data.slice(args[1].value, stop)
+
+
+def bytes_find(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    """find 作用于 BYTES 时的实现, 要查找的内容可以是 BYTES 或 STRING (按 utf-8 编码)"""
+    if err := check_args(pos, "find", args, [BYTES, None, INTEGER], optional=1):
+        return err
+    data: obj.Bytes = args[0]
+    match sub := args[1]:
+        case obj.Bytes():
+            needle = sub.tobytes()
+        case obj.String():
+            needle = sub.value.encode()
+        case _:
+            return obj.Error(pos, f"argument 2 to `find` must be BYTES or STRING. got {sub.type().value}")
+    start = args[2].value if len(args) > 2 else 0
+    start = slice(start, None).indices(len(data))[0]
+    found = data.base.find(needle, data.start + start, data.stop)
+    return obj.Integer(found - data.start if found >= 0 else -1)
+
+
+unpack_format = re.compile(r"[@=<>!]?(\d*[bBhHiIlLqQx])*")
+"""unpack 只支持整数与填充字节"""
+
+
+def unpack(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "unpack", args, [BYTES, STRING, INTEGER], optional=1):
+        return err
+    data: obj.Bytes = args[0]
+    fmt = args[1].value
+    offset = args[2].value if len(args) > 2 else 0
+    if not unpack_format.fullmatch(fmt):
+        return obj.Error(pos, f"unsupported format '{fmt}' for `unpack`")
+    size = struct.calcsize(fmt)
+    if not 0 <= offset <= len(data) - size:
+        return obj.Error(
+            pos,
+            f"`unpack` needs {size} bytes at offset {offset}, but bytes has length {len(data)}"
+        )
+    values = struct.unpack_from(fmt, data.base, data.start + offset)
+    return obj.Array([obj.Integer(v) for v in values])
+
+
+# ========== json ==========
+
+KEY_CACHE_SIZE = 4096
+"""一次解析中最多复用的哈希键个数, 避免流式读取时键缓存无限增长"""
+
+KeyCache = dict[str, tuple[obj.HashKey, obj.String]]
+
+
+def json_decoder() -> json.JSONDecoder:
+    """小数以及 NaN/Infinity 没有对应的 Monkey 类型, 保留其原始文本作为字符串"""
+    return json.JSONDecoder(parse_float=str, parse_constant=str)
+
+
+def from_python(value, keys: KeyCache) -> obj.MonkeyObj:
+    """将 json 解码得到的 python 对象转换为 Monkey 对象.
+    相同的哈希键在 keys 中共享同一个 STRING 对象, null/true/false 使用单例"""
+    t = type(value)
+    if t is str:
+        return obj.String(value)
+    if t is dict:
+        pairs = {}
+        for k, v in value.items():
+            entry = keys.get(k)
+            if entry is None:
+                key = obj.String(k)
+                entry = (key.hashkey(), key)
+                if len(keys) < KEY_CACHE_SIZE:
+                    keys[k] = entry
+            pairs[entry[0]] = obj.HashPair(entry[1], from_python(v, keys))
+        return obj.Hash(pairs)
+    if t is list:
+        return obj.Array([from_python(v, keys) for v in value])
+    if t is int:
+        return obj.Integer(value)
+    if value is True:
+        return TRUE
+    if value is False:
+        return FALSE
+    return NULL
+
+
+def to_python(value: obj.MonkeyObj):
+    """将 Monkey 对象转换为可以被 json 编码的 python 对象,
+    遇到无法表示的对象时抛出 TypeError"""
+    match value:
+        case obj.String() | obj.Integer() | obj.Boolean():
+            return value.value
+        case obj.Null():
+            return None
+        case obj.Array():
+            return [to_python(e) for e in value.elements]
+        case obj.Hash():
+            # JSON 对象的键只能是字符串, 其他类型的键转成字符串后可能互相覆盖
+            result = {}
+            for p in value.pairs.values():
+                if type(p.key) is not obj.String:
+                    raise TypeError(f"non-string hash key {p.key.type().value}")
+                result[p.key.value] = to_python(p.value)
+            return result
+        case obj.Record():
+            return {
+                f: to_python(v)
+                for f, v in zip(value.struct.fields, value.values)
+            }
+        case _:
+            raise TypeError(value.type().value)
+
+
+def json_parse(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "json_parse", args, [STRING]):
+        return err
+    try:
+        data = json_decoder().decode(args[0].value)
+    except ValueError as e:
+        return obj.Error(pos, f"invalid json for `json_parse`: {e}")
+    return from_python(data, {})
+
+
+def json_dump(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "json_dump", args, [None, INTEGER], optional=1):
+        return err
+    indent = args[1].value if len(args) > 1 else None
+    try:
+        data = to_python(args[0])
+    except TypeError as e:
+        return obj.Error(pos, f"`json_dump` not support {e}")
+    except RecursionError:
+        return obj.Error(pos, "`json_dump` not support recursive object")
+    return obj.String(json.dumps(data, ensure_ascii=False, indent=indent))
+
+
+def json_lines(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "json_lines", args, [STRING]):
+        return err
+    path = args[0].value
+
+    def records():
+        # 在开始遍历时才打开文件, 从未遍历的迭代器不会占用文件
+        try:
+            file = open(path, encoding="utf-8")
+        except OSError as e:
+            yield obj.Error(pos, f"can not open '{path}': {e.strerror}")
+            return
+        decoder = json_decoder()
+        keys: KeyCache = {}
+        with file:
+            for lineno, line in enumerate(file, 1):
+                if line.isspace():
+                    continue
+                try:
+                    data = decoder.decode(line)
+                except ValueError as e:
+                    yield obj.Error(pos, f"invalid json at {path}:{lineno}: {e}")
+                    return
+                yield from_python(data, keys)
+
+    return obj.Iterator("json_lines", records())
+
+
+# ========== memory ==========
+
+def memstats(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+    if err := check_args(pos, "memstats", args, []):
+        return err
+    if not tracker.running:
+        return obj.Error(pos, "memstats is not enabled, run with --memstats")
+    snap = tracker.snapshot()
+    # 结果本身不计入之后的统计
+    with tracker.pause():
+        types = {
+            name: new_hash({k: obj.Integer(v) for k, v in counts.items()})
+            for name, counts in snap["types"].items()
+        }
+        return new_hash({
+            "types": new_hash(types),
+            "live": obj.Integer(snap["live"]),
+            "peak": obj.Integer(snap["peak"]),
+        })
+
+
 class Builtins():
     """内置对象空间"""
     def __init__(self):
@@ -107,6 +847,41 @@ class Builtins():
         self.bind_py("last", last)
         self.bind_py("rest", rest)
         self.bind_py("push", push)
+        self.bind_py("join", join)
+        self.bind_py("string_builder", string_builder)
+        self.bind_py("append", append)
+        self.bind_py("build", build)
+        self.bind_py("split", split)
+        self.bind_py("substr", substr)
+        self.bind_py("find", find)
+        self.bind_py("replace", replace)
+        self.bind_py("upper", upper)
+        self.bind_py("lower", lower)
+        self.bind_py("trim", trim)
+        self.bind_py("starts_with", starts_with)
+        self.bind_py("ends_with", ends_with)
+        self.bind_py("chars", chars)
+        self.bind_py("format", format_)
+        self.bind_py("re_match", re_match)
+        self.bind_py("re_find_all", re_find_all)
+        self.bind_py("re_replace", re_replace)
+        self.bind_py("re_split", re_split)
+        self.bind_py("re_stats", re_stats)
+        self.bind_py("json_parse", json_parse)
+        self.bind_py("json_dump", json_dump)
+        self.bind_py("json_lines", json_lines)
+        self.bind_py("open", open_)
+        self.bind_py("read_lines", read_lines)
+        self.bind_py("read_csv", read_csv)
+        self.bind_py("write", write)
+        self.bind_py("flush", flush)
+        self.bind_py("close", close)
+        self.bind_py("mmap_file", mmap_file)
+        self.bind_py("encode", encode)
+        self.bind_py("decode", decode)
+        self.bind_py("slice", slice_)
+        self.bind_py("unpack", unpack)
+        self.bind_py("memstats", memstats)
 
     def set(self, key: str, value: obj.MonkeyObj) -> None:
         if not isinstance(value, obj.MonkeyObj):
@@ -123,3 +898,7 @@ class Builtins():
         ) -> None:
         """将一个 python 函数绑定到内置对象空间"""
         self.set(name, obj.Python(name, func))
+
+    def functions(self) -> list[obj.Python]:
+        """所有绑定的 python 函数"""
+        return [v for v in self.__store.values() if isinstance(v, obj.Python)]
@@ -0,0 +1,206 @@
+"""python 扩展模块
+
+`import foo` 在当前目录下找不到 foo.monkey 时, 会按以下顺序查找扩展模块:
+
+1. 搜索路径中的 foo.py, 搜索路径依次为 paths 中的目录、环境变量 MONKEYPATH
+   中列出的目录 (以 os.pathsep 分隔) 以及随解释器提供的 evaluator/modules.
+   当前目录不在搜索路径中, 以免其中无关的 .py 文件 (如 main.py) 被当作扩展执行
+2. 已安装的包在 "monkey.modules" 入口点组中注册的名为 foo 的入口点
+
+导入扩展模块会执行任意的 python 代码, 只应把可信的目录加入搜索路径.
+每个扩展模块在进程中只加载一次, 之后的 import 直接使用缓存的模块.
+
+扩展模块需要提供 `register(module: Registry)` 函数 (入口点也可以直接指向
+这个函数), 在其中向 Monkey 模块注册函数与常量:
+
+    from evaluator.extension import MonkeyError
+
+    def register(module):
+        module.constant("version", "1.0")
+
+        @module.function
+        def clamp(x, low, high):
+            if low > high:
+                raise MonkeyError("low must not be greater than high")
+            return max(low, min(x, high))
+
+Monkey 中通过 `foo->clamp(15, 0, 10)` 调用.
+
+参数与返回值的转换规则 (ABI):
+
+* Monkey -> python: INTEGER -> int, STRING -> str, BOOLEAN -> bool,
+  null -> None, ARRAY -> list, HASH -> dict, BYTES -> memoryview (不复制数据),
+  其余对象 (函数、记录等) 原样传入
+* python -> Monkey: None -> null, bool -> BOOLEAN, int -> INTEGER,
+  str -> STRING, bytes -> BYTES, list/tuple -> ARRAY, dict -> HASH,
+  MonkeyObj 原样返回, 其他类型视为错误
+* 函数抛出 MonkeyError 时, 其消息成为带调用位置的 ERROR 对象;
+  抛出其他异常时, 错误消息中会包含异常类型
+
+需要直接处理 MonkeyObj 的函数可以使用 `module.raw(name, func)` 注册,
+func 的签名与内置函数相同, 即 (pos, args) -> MonkeyObj, 不做任何转换
+"""
+import importlib.util
+import os
+import threading
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Callable
+from lexer.token import Position
+from evaluator import objsys as obj
+from evaluator.builtins import TRUE, FALSE, NULL, pyfunc, pyfunc_args
+
+
+ENTRY_POINT_GROUP = "monkey.modules"
+
+
+class MonkeyError(Exception):
+    """扩展函数抛出该异常以返回一个 Monkey 运行时错误"""
+
+
+def to_native(value: obj.MonkeyObj):
+    """将 Monkey 对象转换为扩展函数的 python 参数"""
+    match value:
+        case obj.Integer() | obj.String() | obj.Boolean():
+            return value.value
+        case obj.Null():
+            return None
+        case obj.Array():
+            return [to_native(e) for e in value.elements]
+        case obj.Hash():
+            return {
+                to_native(p.key): to_native(p.value)
+                for p in value.pairs.values()
+            }
+        case obj.Bytes():
+            return memoryview(value.base)[value.start:value.stop]
+        case _:
+            return value
+
+
+def from_native(value) -> obj.MonkeyObj:
+    """将扩展函数返回的 python 对象转换为 Monkey 对象, 不支持的类型抛出 TypeError"""
+    if value is None:
+        return NULL
+    if value is True:
+        return TRUE
+    if value is False:
+        return FALSE
+    match value:
+        case obj.MonkeyObj():
+            return value
+        case int():
+            return obj.Integer(value)
+        case str():
+            return obj.String(value)
+        case bytes():
+            return obj.Bytes(value)
+        case list() | tuple():
+            return obj.Array([from_native(e) for e in value])
+        case dict():
+            pairs = {}
+            for k, v in value.items():
+                key = from_native(k)
+                if not isinstance(key, obj.Hashable):
+                    raise TypeError(f"{key.type().value} is not hashable")
+                pairs[key.hashkey()] = obj.HashPair(key, from_native(v))
+            return obj.Hash(pairs)
+        case _:
+            raise TypeError(f"can not convert {type(value).__name__} to Monkey object")
+
+
+class Registry():
+    """扩展模块的注册接口, 注册的内容保存在 Monkey 模块的环境中"""
+    def __init__(self, name: str):
+        self.name = name
+        self.env = obj.Environment()
+
+    def function(self, func: Callable = None, *, name: str = None):
+        """注册一个按 ABI 转换参数与返回值的函数, 也可以作为装饰器使用"""
+        if func is None:
+            return lambda f: self.function(f, name=name)
+        name = name or func.__name__
+        qualname = f"{self.name}->{name}"
+
+        def call(pos: Position, args: pyfunc_args) -> obj.MonkeyObj:
+            try:
+                return from_native(func(*[to_native(a) for a in args]))
+            except MonkeyError as e:
+                return obj.Error(pos, str(e))
+            except Exception as e:
+                return obj.Error(pos, f"error in `{qualname}`: {type(e).__name__}: {e}")
+
+        self.env.set(name, obj.Python(qualname, call))
+        return func
+
+    def raw(self, name: str, func: pyfunc) -> pyfunc:
+        """注册一个直接处理 MonkeyObj 的函数, 签名与内置函数相同"""
+        self.env.set(name, obj.Python(f"{self.name}->{name}", func))
+        return func
+
+    def constant(self, name: str, value) -> None:
+        """注册一个常量"""
+        self.env.set(name, from_native(value))
+
+
+BUNDLED_MODULES = os.path.join(os.path.dirname(__file__), "modules")
+"""随解释器提供的扩展模块 (如 numeric) 所在的目录"""
+
+
+paths: list[str] = []
+"""嵌入解释器时可以加入的扩展模块目录, 排在 MONKEYPATH 之前"""
+
+
+def search_path() -> list[str]:
+    """扩展模块的搜索路径, 随解释器提供的模块排在最后"""
+    path = list(paths)
+    extra = os.environ.get("MONKEYPATH")
+    if extra:
+        path += [p for p in extra.split(os.pathsep) if p]
+    path.append(BUNDLED_MODULES)
+    return path
+
+
+def find_register(name: str) -> Callable[[Registry], None] | None:
+    """查找扩展模块的 register 函数, 找不到时返回 None"""
+    for directory in search_path():
+        path = os.path.join(directory, f"{name}.py")
+        if os.path.isfile(path):
+            spec = importlib.util.spec_from_file_location(f"monkey_ext_{name}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module.register
+    for ep in entry_points(group=ENTRY_POINT_GROUP, name=name):
+        target = ep.load()
+        if isinstance(target, ModuleType):
+            return target.register
+        return target
+    return None
+
+
+loaded: dict[str, obj.Module] = {}
+"""已加载的扩展模块"""
+
+load_lock = threading.Lock()
+"""避免多个线程同时导入时重复执行扩展模块"""
+
+
+def load(name: str, pos: Position) -> obj.Module | obj.Error:
+    """加载名为 name 的扩展模块, 加载成功的模块会被缓存"""
+    module = loaded.get(name)
+    if module is not None:
+        return module
+    with load_lock:
+        module = loaded.get(name)
+        if module is not None:
+            return module
+        try:
+            register = find_register(name)
+            if register is None:
+                return obj.Error(pos, f"import error, can not load '{name}'")
+            registry = Registry(name)
+            register(registry)
+        except Exception as e:
+            return obj.Error(pos, f"import error, failed to load extension '{name}': {type(e).__name__}: {e}")
+        module = loaded[name] = obj.Module(name, registry.env)
+        return module
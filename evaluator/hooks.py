@@ -0,0 +1,156 @@
+"""求值过程的事件钩子
+
+嵌入解释器时可以注册钩子函数来跟踪程序的执行:
+
+    from evaluator.hooks import hooks
+
+    @hooks.on_return
+    def trace(func, args, result, elapsed):
+        print(func.name, elapsed)
+
+事件与钩子函数的参数:
+
+* call      (func, args)                    进入 Monkey 函数, func 为 objsys.Function
+* return    (func, args, result, elapsed)   Monkey 函数返回, elapsed 为耗时 (秒)
+* builtin   (name, args, result, elapsed)   调用内置函数
+* error     (error,)                        创建 objsys.Error 对象
+* import    (name, result, elapsed)         执行 import 语句, 成功时 result 为导入的模块
+
+某个事件第一次注册钩子时才通过 evaluator.instrument 给求值器中对应的函数
+(apply_function, 内置函数, eval_import_statement, Error.__init__) 加上触发事件的包装,
+最后一个钩子注销时移除, 与性能分析等其他包装可以按任意顺序启用和停止,
+因此没有注册钩子时求值器没有任何额外开销. 树遍历求值器与 JIT 编译的代码都通过
+模块全局的名字调用这些函数, 两者的执行都会触发事件.
+钩子函数抛出的异常不会被捕获"""
+import time
+from typing import Callable
+import evaluator
+from evaluator import instrument
+from evaluator import objsys as obj
+
+
+EVENTS = ("call", "return", "builtin", "error", "import")
+
+GROUPS = {
+    "function": ("call", "return"),
+    "builtin": ("builtin",),
+    "error": ("error",),
+    "import": ("import",),
+}
+"""同一组事件共用一个替换后的函数"""
+
+
+class Hooks():
+    """钩子注册表"""
+    def __init__(self):
+        self.handlers: dict[str, list[Callable]] = {e: [] for e in EVENTS}
+        self.installed: dict[str, object] = {}
+        """已安装包装的组 -> 在 evaluator.instrument 中代表这一组的标识"""
+
+    def register(self, event: str, handler: Callable) -> Callable:
+        """注册钩子函数, 返回 handler 本身"""
+        if event not in self.handlers:
+            raise ValueError(f"unknown event '{event}', choose from {', '.join(EVENTS)}")
+        self.handlers[event].append(handler)
+        self.update()
+        return handler
+
+    def unregister(self, event: str, handler: Callable) -> None:
+        self.handlers[event].remove(handler)
+        self.update()
+
+    def clear(self) -> None:
+        """注销所有钩子"""
+        for handlers in self.handlers.values():
+            handlers.clear()
+        self.update()
+
+    def on_call(self, handler: Callable) -> Callable:
+        return self.register("call", handler)
+
+    def on_return(self, handler: Callable) -> Callable:
+        return self.register("return", handler)
+
+    def on_builtin(self, handler: Callable) -> Callable:
+        return self.register("builtin", handler)
+
+    def on_error(self, handler: Callable) -> Callable:
+        return self.register("error", handler)
+
+    def on_import(self, handler: Callable) -> Callable:
+        return self.register("import", handler)
+
+    def update(self) -> None:
+        """按是否有钩子安装或移除各组的包装"""
+        for group, events in GROUPS.items():
+            wanted = any(self.handlers[e] for e in events)
+            if wanted and group not in self.installed:
+                owner = self.installed[group] = object()
+                getattr(self, f"install_{group}")(owner)
+            elif not wanted and group in self.installed:
+                instrument.unwrap(self.installed.pop(group))
+
+    def install_function(self, owner) -> None:
+        calls, returns = self.handlers["call"], self.handlers["return"]
+        clock = time.perf_counter
+
+        def wrap(apply_function):
+            def hooked(func: obj.Function, args: list[obj.MonkeyObj]) -> obj.MonkeyObj:
+                for handler in calls:
+                    handler(func, args)
+                start = clock()
+                result = apply_function(func, args)
+                elapsed = clock() - start
+                for handler in returns:
+                    handler(func, args, result, elapsed)
+                return result
+            return hooked
+        instrument.wrap(owner, evaluator, "apply_function", wrap)
+
+    def install_builtin(self, owner) -> None:
+        handlers = self.handlers["builtin"]
+        clock = time.perf_counter
+
+        def wrap(name: str, func):
+            def hooked(pos, args):
+                start = clock()
+                result = func(pos, args)
+                elapsed = clock() - start
+                for handler in handlers:
+                    handler(name, args, result, elapsed)
+                return result
+            return hooked
+
+        for py in evaluator.builtins.functions():
+            instrument.wrap(owner, py, "func", lambda func, name=py.name: wrap(name, func))
+
+    def install_error(self, owner) -> None:
+        handlers = self.handlers["error"]
+
+        def wrap(init):
+            def hooked(error, *args, **kwargs):
+                init(error, *args, **kwargs)
+                for handler in handlers:
+                    handler(error)
+            return hooked
+        instrument.wrap(owner, obj.Error, "__init__", wrap)
+
+    def install_import(self, owner) -> None:
+        handlers = self.handlers["import"]
+        clock = time.perf_counter
+
+        def wrap(eval_import_statement):
+            def hooked(stmt, env: obj.Environment) -> obj.MonkeyObj:
+                start = clock()
+                result = eval_import_statement(stmt, env)
+                elapsed = clock() - start
+                module = result if evaluator.is_error(result) else env.get(stmt.module)
+                for handler in handlers:
+                    handler(stmt.module, module, elapsed)
+                return result
+            return hooked
+        instrument.wrap(owner, evaluator, "eval_import_statement", wrap)
+
+
+hooks = Hooks()
+"""解释器使用的钩子注册表"""
@@ -0,0 +1,62 @@
+"""求值器函数的分层包装
+
+性能分析 (profile)、统计 (stats) 与钩子 (hooks) 都通过替换求值器中的函数来观察执行,
+如模块全局的 apply_function、Eval, 内置函数对象的 func 以及 Error.__init__.
+它们统一通过这里安装与移除包装:
+
+    instrument.wrap(owner, evaluator, "apply_function", make_wrapper)
+    instrument.unwrap(owner)
+
+make_wrapper 接收内层的实现并返回包装后的函数. 每个被包装的属性 (目标) 记录原始实现
+与按安装顺序排列的各层包装, 增删任何一层时都从原始实现重新构造整条包装链,
+因此多个观察者可以按任意顺序启用和停止, 最后一层移除时恢复原始实现"""
+from typing import Callable
+
+
+Wrapper = Callable[[Callable], Callable]
+
+
+class Target():
+    """一个被包装的属性"""
+    def __init__(self, holder, name: str):
+        self.holder = holder
+        self.name = name
+        self.original = getattr(holder, name)
+        self.inherited = isinstance(holder, type) and name not in vars(holder)
+        """类从基类继承的属性, 移除最后一层时删除而不是写回, 恢复继承关系"""
+        self.layers: list[tuple[object, Wrapper]] = []
+        """(安装者, 包装函数), 后安装的在外层"""
+
+    def rebuild(self) -> None:
+        if self.inherited and not self.layers:
+            delattr(self.holder, self.name)
+            return
+        func = self.original
+        for _, wrapper in self.layers:
+            func = wrapper(func)
+        setattr(self.holder, self.name, func)
+
+
+targets: dict[tuple[int, str], Target] = {}
+
+
+def wrap(owner, holder, name: str, wrapper: Wrapper) -> None:
+    """以 owner 的名义给 holder.name 加一层包装"""
+    key = (id(holder), name)
+    target = targets.get(key)
+    if target is None:
+        target = targets[key] = Target(holder, name)
+    target.layers.append((owner, wrapper))
+    target.rebuild()
+
+
+def unwrap(owner) -> None:
+    """移除 owner 安装的所有包装"""
+    for key, target in list(targets.items()):
+        layers = [layer for layer in target.layers if layer[0] is not owner]
+        if len(layers) == len(target.layers):
+            continue
+        target.layers = layers
+        target.rebuild()
+        if not layers:
+            del targets[key]
@@ -0,0 +1,158 @@
+"""在 python 程序中嵌入解释器
+
+同一段 Monkey 代码需要反复执行时, 只解析一次, 之后每次以不同的全局变量运行:
+
+    from evaluator.interpreter import Interpreter
+
+    interp = Interpreter(prelude="let double = fn(x) { x * 2 };", imports=["numeric"])
+    rule = interp.compile("double(price) > limit")
+    rule.run({"price": 30, "limit": 50})   # => True
+
+prelude 与 imports 只在创建 Interpreter 时求值一次, 结果保存在基础环境中.
+每次运行在以基础环境为外层的新环境中求值, 不复制基础环境, 程序中 let 绑定的名字
+只存在于这次运行的环境中, 运行结束后即被丢弃, 不会影响之后的运行.
+Monkey 中的数组、哈希表、结构体等值都是不可变的, 所以基础环境中的值也不会被修改.
+例外是 string_builder (append 会修改它) 以及文件与迭代器 (只能使用一次), 它们的状态
+会在多次运行与多个线程之间泄漏, 因此 prelude 与 imports 的结果中 (包括数组、哈希表、
+结构体、模块与闭包内部) 出现这些值时 Interpreter 会抛出 ValueError.
+
+全局变量与返回值按 evaluator.extension 中的规则在 python 对象与 Monkey 对象之间转换.
+AST 上的特化缓存与 JIT 编译的结果在多次运行之间共享, 这正是只解析一次的好处
+
+多个线程可以同时运行同一个或不同的 Program:
+
+* 共享且只读: AST, 内置函数表 (evaluator.builtins), TRUE/FALSE/NULL 等单例,
+  以及 Interpreter 的基础环境
+* 共享但可以并发写入: AST 上的特化与 JIT 缓存. 并发写入时只会重复计算,
+  任一线程写入的结果都是正确的
+* 每次运行独立: 运行环境以及其中的绑定
+* 每个线程独立: 叶子函数的帧池 (evaluator.frames), 以及 run 给出 stdout 时的输出
+
+这些状态都不依赖 GIL 保证一致性, 因此也可以在 free-threaded 的 python 中使用.
+性能分析、统计与钩子 (--profile, --stats, --memstats, evaluator.hooks) 作用于整个进程"""
+from typing import IO, Any
+import evaluator
+from lexer import Lexer
+from parser import Parser, ParserError
+from parser import ast
+from evaluator import objsys as obj
+from evaluator.builtins import output
+from evaluator.extension import from_native, to_native
+
+
+class CompileError(Exception):
+    """源码中有语法错误"""
+    def __init__(self, errors: list[ParserError]):
+        super().__init__("\n".join(f"line {e.pos.y}, column {e.pos.x}: {e.msg}" for e in errors))
+        self.errors = errors
+
+
+class ExecutionError(Exception):
+    """运行时产生了 Monkey 错误"""
+    def __init__(self, error: obj.Error):
+        super().__init__(error.inspect())
+        self.error = error
+
+
+STATEFUL = (obj.StringBuilder, obj.File, obj.Iterator)
+"""会被修改或只能使用一次的值, 不能放在基础环境中"""
+
+
+def closure_bindings(env: obj.Environment, seen: set[int]):
+    """闭包环境链上尚未检查过的绑定"""
+    while env is not None and id(env) not in seen:
+        seen.add(id(env))
+        yield from env.store.items()
+        env = env.outer
+
+
+def find_stateful(value: obj.MonkeyObj, path: str, seen: set[int]) -> tuple[str, obj.MonkeyObj] | None:
+    """在值以及它包含的值中查找 STATEFUL 类型的值, 返回 (路径, 值)"""
+    if id(value) in seen:
+        return None
+    seen.add(id(value))
+    if isinstance(value, STATEFUL):
+        return path, value
+    match value:
+        case obj.Array():
+            items = ((f"{path}[{i}]", v) for i, v in enumerate(value.elements))
+        case obj.Hash():
+            items = ((f"{path}[{p.key.inspect()}]", p.value) for p in value.pairs.values())
+        case obj.Record():
+            items = ((f"{path}.{f}", v) for f, v in zip(value.struct.fields, value.values))
+        case obj.Module():
+            items = ((f"{path}.{k}", v) for k, v in value.env.store.items())
+        case obj.Function():
+            # 闭包捕获的变量
+            items = ((f"{path}.{k}", v) for k, v in closure_bindings(value.env, seen))
+        case _:
+            return None
+    for item_path, item in items:
+        if found := find_stateful(item, item_path, seen):
+            return found
+    return None
+
+
+def parse(source: str) -> ast.Program:
+    p = Parser(Lexer(source))
+    program = p.parse_program()
+    if len(p.errors):
+        raise CompileError(p.errors)
+    return program
+
+
+class Program():
+    """解析后的程序, 可以反复运行"""
+    def __init__(self, interpreter: "Interpreter", program: ast.Program):
+        self.interpreter = interpreter
+        self.program = program
+
+    def run(self, globals: dict[str, Any] = None, stdout: IO = None) -> Any:
+        """以 globals 中的值作为全局变量运行程序, 返回最后一个表达式的值.
+        给出 stdout 时, 运行期间 puts 的输出写到 stdout 中"""
+        return to_native(self.run_object(globals, stdout))
+
+    def run_object(self, globals: dict[str, Any] = None, stdout: IO = None) -> obj.MonkeyObj:
+        """与 run 相同, 但直接返回 Monkey 对象"""
+        env = obj.Environment(self.interpreter.base)
+        if globals:
+            store = env.store
+            for name, value in globals.items():
+                store[name] = from_native(value)
+        if stdout is None:
+            result = evaluator.Eval(self.program, env)
+        else:
+            with output.redirect(stdout):
+                result = evaluator.Eval(self.program, env)
+        if type(result) is obj.Error:
+            raise ExecutionError(result)
+        return result
+
+
+class Interpreter():
+    """持有预先求值的基础环境, 由它编译的程序都在这个环境之上运行"""
+    def __init__(self, prelude: str = "", imports: list[str] = ()):
+        self.base = obj.Environment()
+        for name in imports:
+            self.evaluate(parse(f"import {name};"))
+        if prelude:
+            self.evaluate(parse(prelude))
+        seen = {id(self.base)}
+        for name, value in self.base.store.items():
+            if found := find_stateful(value, name, seen):
+                path, value = found
+                raise ValueError(
+                    f"'{path}' is a {value.type().value}, which cannot be shared between runs"
+                )
+
+    def evaluate(self, program: ast.Program) -> None:
+        result = evaluator.Eval(program, self.base)
+        if type(result) is obj.Error:
+            raise ExecutionError(result)
+
+    def compile(self, source: str) -> Program:
+        return Program(self, parse(source))
+
+    def run(self, source: str, globals: dict[str, Any] = None) -> Any:
+        """编译并运行一次"""
+        return self.compile(source).run(globals)
@@ -0,0 +1,456 @@
+from lexer.token import Position
+from parser import ast
+from evaluator import objsys as obj
+from evaluator.analysis import children
+
+
+THRESHOLD = 100
+"""函数被调用多少次后触发编译"""
+
+enabled = True
+"""是否启用编译, 关闭后所有函数都由树遍历求值器执行"""
+
+
+class Unsupported(Exception):
+    """函数体中含有编译器不支持的结构"""
+
+
+class Unset():
+    """尚未被 let 绑定的局部变量"""
+
+
+UNSET = Unset()
+
+
+def lookup(env: obj.Environment, name: str, pos: Position, builtins) -> obj.MonkeyObj:
+    """在闭包环境与内置对象空间中查找自由变量"""
+    val = env.get(name)
+    if val is None:
+        val = builtins.get(name)
+    if val is not None:
+        return val
+    return obj.Error(pos, f"identifier not found: {name}")
+
+
+integer_arith: dict[str, str] = {
+    '+': '+',
+    '-': '-',
+    '*': '*',
+    '/': '//',
+    '%': '%',
+    '&': '&',
+    '|': '|',
+    '^': '^',
+}
+"""整型算术运算符到 python 运算符的映射, 注意 Monkey 的 '/' 是整除.
+移位运算需要检查位数, 不在此列, 始终调用通用实现"""
+
+integer_compare: dict[str, str] = {
+    '>':  '>',
+    '<':  '<',
+    '>=': '>=',
+    '<=': '<=',
+    '==': '==',
+    '!=': '!=',
+}
+"""整型比较运算符到 python 运算符的映射"""
+
+
+class Scope():
+    """编译期的作用域, 记录 Monkey 名字到 python 局部变量名的映射"""
+    def __init__(self):
+        self.names: dict[str, str] = {}
+        self.assigned: set[str] = set()
+        """在当前翻译位置上必然已被赋值的名字"""
+
+
+class Compiler():
+    """将 Monkey 函数翻译为 python 源码.
+
+    生成的函数签名为 (env, args), env 是函数的闭包环境, args 是实参列表.
+    参数、let 绑定的局部变量与循环变量被翻译为 python 局部变量, 自由变量在运行时
+    通过 env 查找. 每个运算都带有类型守卫, 守卫失败时调用求值器中对应的
+    通用实现, 因此语义与树遍历求值器保持一致, 包括带位置信息的 Error 对象"""
+    def __init__(self, func: obj.Function):
+        self.func = func
+        self.scopes: list[Scope] = []
+        self.consts: list[obj.MonkeyObj] = []
+        self.positions: list[Position] = []
+        self.lines: list[str] = []
+        self.depth = 2
+        self.tmp_count = 0
+
+    # ----- 代码生成的辅助方法 -----
+
+    def emit(self, line: str) -> None:
+        self.lines.append('    ' * self.depth + line)
+
+    def tmp(self) -> str:
+        self.tmp_count += 1
+        return f"_t{self.tmp_count}"
+
+    def const(self, value: obj.MonkeyObj) -> str:
+        self.consts.append(value)
+        return f"K{len(self.consts) - 1}"
+
+    def pos(self, node: ast.Node) -> str:
+        self.positions.append(node.TokenPos())
+        return f"P[{len(self.positions) - 1}]"
+
+    def check_error(self, name: str) -> None:
+        self.emit(f"if type({name}) is Error: return {name}")
+
+    # ----- 作用域 -----
+
+    def push_scope(self, nodes: list[ast.Node]) -> Scope:
+        """进入一个新的作用域, 为 nodes 中 let 绑定的名字分配局部变量并初始化为 UNSET.
+        循环体有自己的作用域, 所以不会深入到嵌套的循环中"""
+        scope = Scope()
+        suffix = f"_{len(self.scopes)}" if self.scopes else ""
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            match node:
+                case ast.LetStatement():
+                    scope.names[node.name.value] = f"v_{node.name.value}{suffix}"
+                    stack.append(node.value)
+                case ast.WhileStatement():
+                    pass
+                case ast.ForStatement():
+                    stack.append(node.iterable)
+                case None:
+                    pass
+                case _:
+                    stack.extend(children(node))
+        for var in sorted(scope.names.values()):
+            self.emit(f"{var} = UNSET")
+        self.scopes.append(scope)
+        return scope
+
+    def bind(self, scope: Scope, name: str, var: str) -> None:
+        """将名字绑定到一个已赋值的局部变量"""
+        scope.names[name] = var
+        scope.assigned.add(name)
+
+    def identifier(self, node: ast.Identifier) -> str:
+        """翻译标识符: 由内向外查找作用域, 未赋值的局部变量会继续向外查找,
+        最终在闭包环境与内置对象空间中查找"""
+        name = node.value
+        t = None
+        for scope in reversed(self.scopes):
+            var = scope.names.get(name)
+            if var is None:
+                continue
+            if name in scope.assigned:
+                if t is None:
+                    return var
+                self.emit(f"if {t} is UNSET: {t} = {var}")
+                return t
+            if t is None:
+                t = self.tmp()
+                self.emit(f"{t} = {var}")
+            else:
+                self.emit(f"if {t} is UNSET: {t} = {var}")
+        lookup_ = f"lookup(env, {name!r}, {self.pos(node)}, builtins)"
+        if t is None:
+            t = self.tmp()
+            self.emit(f"{t} = {lookup_}")
+            self.check_error(t)
+        else:
+            self.emit(f"if {t} is UNSET:")
+            self.emit(f"    {t} = {lookup_}")
+            self.emit(f"    if type({t}) is Error: return {t}")
+        return t
+
+    # ----- 翻译 -----
+
+    def compile(self) -> str:
+        """生成函数源码"""
+        scope = self.push_scope([self.func.body])
+        for i, p in enumerate(self.func.parameters):
+            self.emit(f"v_{p.value} = args[{i}]")
+            self.bind(scope, p.value, f"v_{p.value}")
+        self.emit("_r = NULL")
+        self.block(self.func.body, "_r", True, True)
+        self.emit("return _r")
+
+        header = [
+            "def factory(K, P, Integer, Error, Array, Function, Python,",
+            "            TRUE, FALSE, NULL, UNSET, lookup, array_index):",
+        ]
+        header += [f"    K{i} = K[{i}]" for i in range(len(self.consts))]
+        header.append("    def jitted(env, args):")
+        return '\n'.join(header + self.lines + ["    return jitted"])
+
+    def block(
+            self,
+            block: ast.BlockStatement,
+            target: str | None,
+            stmt_pos: bool,
+            definite: bool = False
+        ) -> None:
+        """翻译块语句, 块的值写入 target.
+        stmt_pos 表示该块是否处于语句位置, 只有语句位置的 return 能翻译为 python 的 return.
+        definite 表示该块是否直接属于当前作用域 (函数体或循环体), 而不是条件分支,
+        此时块中 let 之后的语句可以确定该名字已被赋值"""
+        statements = block.statements
+        if not statements:
+            if target:
+                self.emit(f"{target} = NULL")
+            return
+        for i, stmt in enumerate(statements):
+            last = i == len(statements) - 1
+            match stmt:
+                case ast.ExpressionStatement():
+                    exp = stmt.expression
+                    if isinstance(exp, ast.IfExpression) and stmt_pos:
+                        self.if_expression(exp, target if last else None, True)
+                    else:
+                        v = self.expression(exp)
+                        if last and target:
+                            self.emit(f"{target} = {v}")
+                case ast.LetStatement():
+                    v = self.expression(stmt.value)
+                    scope = self.scopes[-1]
+                    self.emit(f"{scope.names[stmt.name.value]} = {v}")
+                    if definite:
+                        scope.assigned.add(stmt.name.value)
+                    if last and target:
+                        self.emit(f"{target} = NULL")
+                case ast.ReturnStatement():
+                    if not stmt_pos:
+                        raise Unsupported("return in expression position")
+                    v = self.expression(stmt.return_value)
+                    self.emit(f"return {v}")
+                    return
+                case ast.WhileStatement():
+                    self.while_statement(stmt, stmt_pos)
+                    if last and target:
+                        self.emit(f"{target} = NULL")
+                case ast.ForStatement():
+                    self.for_statement(stmt, stmt_pos)
+                    if last and target:
+                        self.emit(f"{target} = NULL")
+                case _:
+                    raise Unsupported(stmt.__class__.__name__)
+
+    def while_statement(self, stmt: ast.WhileStatement, stmt_pos: bool) -> None:
+        """翻译 while 循环, 条件表达式与循环体共享循环的作用域"""
+        self.push_scope([stmt.condition, stmt.body])
+        self.emit("while True:")
+        self.depth += 1
+        cond = self.expression(stmt.condition)
+        self.emit(f"if {cond} is NULL or {cond} is FALSE: break")
+        self.block(stmt.body, None, stmt_pos, True)
+        self.depth -= 1
+        self.scopes.pop()
+
+    def for_statement(self, stmt: ast.ForStatement, stmt_pos: bool) -> None:
+        """翻译 for-in 循环"""
+        iterable = self.expression(stmt.iterable)
+        items = self.tmp()
+        self.emit(f"{items} = loop_items({iterable}, {self.pos(stmt)})")
+        self.check_error(items)
+        scope = self.push_scope([stmt.body])
+        var = f"v_{stmt.variable.value}_{len(self.scopes) - 1}"
+        self.bind(scope, stmt.variable.value, var)
+        self.emit(f"for {var} in {items}:")
+        self.depth += 1
+        count = len(self.lines)
+        self.block(stmt.body, None, stmt_pos, True)
+        if len(self.lines) == count:
+            self.emit("pass")
+        self.depth -= 1
+        self.scopes.pop()
+        error = self.tmp()
+        self.emit(f"{error} = loop_error({iterable})")
+        self.emit(f"if {error} is not None: return {error}")
+
+    def branch(
+            self,
+            block: ast.BlockStatement,
+            target: str | None,
+            stmt_pos: bool
+        ) -> None:
+        """翻译条件表达式的一个分支"""
+        self.depth += 1
+        count = len(self.lines)
+        self.block(block, target, stmt_pos)
+        if len(self.lines) == count:
+            self.emit("pass")
+        self.depth -= 1
+
+    def if_expression(
+            self,
+            node: ast.IfExpression,
+            target: str | None,
+            stmt_pos: bool
+        ) -> None:
+        """翻译条件表达式"""
+        cond = self.expression(node.condition)
+        self.emit(f"if {cond} is not NULL and {cond} is not FALSE:")
+        self.branch(node.consequence, target, stmt_pos)
+        if node.alternative:
+            self.emit("else:")
+            self.branch(node.alternative, target, stmt_pos)
+        elif target:
+            self.emit("else:")
+            self.emit(f"    {target} = NULL")
+
+    def expression(self, node: ast.Expression) -> str:
+        """翻译表达式, 返回一个保存表达式结果的 python 表达式"""
+        match node:
+            case ast.IntegerLiteral():
+                return self.const(obj.Integer(node.value))
+
+            case ast.StringLiteral():
+                return self.const(obj.String(node.value))
+
+            case ast.Boolean():
+                return "TRUE" if node.value else "FALSE"
+
+            case ast.NullLiteral():
+                return "NULL"
+
+            case ast.Identifier():
+                return self.identifier(node)
+
+            case ast.PrefixExpression():
+                right = self.expression(node.right)
+                t = self.tmp()
+                match node.operator:
+                    case '!':
+                        self.emit(f"{t} = TRUE if ({right} is FALSE or {right} is NULL) else FALSE")
+                    case '-':
+                        self.emit(f"if type({right}) is Integer: {t} = Integer(-{right}.value)")
+                        self.emit("else:")
+                        self.emit(f"    {t} = eval_prefix_expression('-', {right}, {self.pos(node)})")
+                        self.emit(f"    if type({t}) is Error: return {t}")
+                    case _:
+                        self.emit(f"{t} = eval_prefix_expression({node.operator!r}, {right}, {self.pos(node)})")
+                        self.check_error(t)
+                return t
+
+            case ast.InfixExpression():
+                left = self.expression(node.left)
+                right = self.expression(node.right)
+                t = self.tmp()
+                generic = f"eval_infix_expression({left}, {node.operator!r}, {right}, {self.pos(node)})"
+                # 整型字面量操作数无需类型守卫, 直接使用其 python 值
+                guards = []
+                operands = []
+                for operand, v in ((node.left, left), (node.right, right)):
+                    if isinstance(operand, ast.IntegerLiteral):
+                        operands.append(repr(operand.value))
+                    else:
+                        guards.append(f"type({v}) is Integer")
+                        operands.append(f"{v}.value")
+                # 除数为 0 时由通用实现返回错误
+                if node.operator in ('/', '%'):
+                    if not isinstance(node.right, ast.IntegerLiteral):
+                        guards.append(f"{operands[1]} != 0")
+                    elif node.right.value == 0:
+                        self.emit(f"{t} = {generic}")
+                        self.check_error(t)
+                        return t
+                if node.operator in integer_arith:
+                    fast = f"Integer({operands[0]} {integer_arith[node.operator]} {operands[1]})"
+                elif node.operator in integer_compare:
+                    fast = f"TRUE if {operands[0]} {integer_compare[node.operator]} {operands[1]} else FALSE"
+                else:
+                    self.emit(f"{t} = {generic}")
+                    self.check_error(t)
+                    return t
+                if not guards:
+                    self.emit(f"{t} = {fast}")
+                    return t
+                self.emit(f"if {' and '.join(guards)}: {t} = {fast}")
+                self.emit("else:")
+                self.emit(f"    {t} = {generic}")
+                self.emit(f"    if type({t}) is Error: return {t}")
+                return t
+
+            case ast.LogicalExpression():
+                left = self.expression(node.left)
+                t = self.tmp()
+                if node.operator == '&&':
+                    self.emit(f"if {left} is NULL or {left} is FALSE: {t} = FALSE")
+                else:
+                    self.emit(f"if {left} is not NULL and {left} is not FALSE: {t} = TRUE")
+                self.emit("else:")
+                self.depth += 1
+                right = self.expression(node.right)
+                self.emit(f"{t} = TRUE if {right} is not NULL and {right} is not FALSE else FALSE")
+                self.depth -= 1
+                return t
+
+            case ast.IfExpression():
+                t = self.tmp()
+                self.if_expression(node, t, False)
+                return t
+
+            case ast.CallExpression():
+                fn = self.expression(node.func)
+                args = [self.expression(a) for a in node.arguments]
+                arg_list = f"[{', '.join(args)}]"
+                t = self.tmp()
+                self.emit(f"if type({fn}) is Function: {t} = apply_function({fn}, {arg_list})")
+                self.emit(f"elif type({fn}) is Python: {t} = {fn}.func({self.pos(node)}, {arg_list})")
+                self.emit(f"else: {t} = apply_struct({fn}, {arg_list}, {self.pos(node)})")
+                self.check_error(t)
+                return t
+
+            case ast.VisitExpression():
+                left = self.expression(node.left)
+                t = self.tmp()
+                self.emit(f"{t} = eval_visit_expression({self.const(node)}, {left})")
+                self.check_error(t)
+                return t
+
+            case ast.ArrayLiteral():
+                elements = [self.expression(e) for e in node.elements]
+                t = self.tmp()
+                self.emit(f"{t} = Array([{', '.join(elements)}])")
+                return t
+
+            case ast.IndexExpression():
+                left = self.expression(node.left)
+                index = self.expression(node.index)
+                t = self.tmp()
+                self.emit(f"{t} = array_index({left}, {index})")
+                self.emit(f"if {t} is None:")
+                self.emit(f"    {t} = eval_index_expression({left}, {index}, {self.pos(node)})")
+                self.emit(f"    if type({t}) is Error: return {t}")
+                return t
+
+            case _:
+                raise Unsupported(node.__class__.__name__)
+
+
+def compile_function(func: obj.Function, runtime: dict):
+    """编译函数, 返回编译后的 python 函数; 函数体不支持编译时返回 None.
+    runtime 是求值器模块的全局命名空间, 生成的代码通过它调用
+    apply_function 等通用实现, 因此对这些名字的重新绑定对编译后的代码同样生效"""
+    compiler = Compiler(func)
+    try:
+        source = compiler.compile()
+    except Unsupported:
+        return None
+    namespace = {}
+    code = compile(source, f"<monkey-jit {func.body.TokenPos().y}>", "exec")
+    exec(code, runtime, namespace)
+    return namespace["factory"](
+        compiler.consts,
+        compiler.positions,
+        obj.Integer,
+        obj.Error,
+        obj.Array,
+        obj.Function,
+        obj.Python,
+        runtime["TRUE"],
+        runtime["FALSE"],
+        runtime["NULL"],
+        UNSET,
+        lookup,
+        runtime["array_index"],
+    )
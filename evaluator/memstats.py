@@ -0,0 +1,214 @@
+"""按对象类型统计 Monkey 对象的分配
+
+start 时通过 evaluator.instrument 给 MonkeyObj、Environment 以及定义了 __init__ 的每个
+子类加上计数的 __init__, 并设置 __del__; 统计期间新定义的子类 (如扩展模块中的类型) 在
+__init_subclass__ 中同样处理. stop 时恢复原来的 __init__ 并删除 __del__, 所以不统计时
+没有任何额外开销. 不替换 __new__: CPython 中给类设置 __new__ 之后即使删除它也不会恢复
+原来的分配函数.
+
+每个对象记录分配它的 Monkey 源码位置: 沿 python 调用栈向上找到最近的 Eval 栈帧,
+取其正在求值的节点的位置; JIT 编译的函数中没有 Eval 栈帧, 位置记为函数体的位置.
+统计开始前创建的对象 (如 TRUE, FALSE, NULL) 以及 pause() 期间创建的对象
+(如 memstats 内置函数返回的结果) 不参与计数.
+
+快照是按键排序的 JSON 文件, 可以直接用 diff 比较, 也可以使用
+
+    python main.py --memstats-diff before.json after.json
+
+列出两次运行之间各类型与各位置的变化"""
+import contextlib
+import json
+import os
+import sys
+from evaluator import instrument
+from evaluator import objsys as obj
+
+
+EVALUATOR_FILE = os.path.join(os.path.dirname(__file__), "__init__.py")
+
+MAX_DEPTH = 64
+"""查找分配位置时最多向上检查的栈帧数"""
+
+UNKNOWN = "?"
+
+
+def subclasses(cls: type) -> list[type]:
+    """cls 以及它的所有子类"""
+    found = [cls]
+    for sub in cls.__subclasses__():
+        found.extend(subclasses(sub))
+    return found
+
+
+def allocation_site(frame) -> str:
+    """由分配对象时的 python 栈帧得到 Monkey 源码位置 行:列"""
+    for _ in range(MAX_DEPTH):
+        if frame is None:
+            break
+        code = frame.f_code
+        if code.co_filename == EVALUATOR_FILE:
+            if code.co_name == "Eval":
+                pos = frame.f_locals["node"].TokenPos()
+                return f"{pos.y}:{pos.x}"
+            if code.co_name == "apply_function":
+                pos = frame.f_locals["func"].body.TokenPos()
+                return f"{pos.y}:{pos.x}"
+        frame = frame.f_back
+    return UNKNOWN
+
+
+class MemStats():
+    """记录各类型对象的存活数、分配总数与存活数的峰值, 以及各源码位置分配的对象"""
+    def __init__(self):
+        self.running = False
+        self.paused = False
+        """为 True 时新分配的对象不计数"""
+        self.live: dict[str, int] = {}
+        self.total: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.live_all = 0
+        self.peak_all = 0
+        self.objects: dict[int, tuple[str, str]] = {}
+        """存活对象的 id -> (类型, 分配位置)"""
+        self.sites: dict[str, dict[str, int]] = {}
+        """分配位置 -> 类型 -> 分配总数"""
+        self.classes = (obj.MonkeyObj, obj.Environment)
+
+    def start(self) -> None:
+        # 之前统计时留下的存活对象已经不再跟踪
+        self.objects.clear()
+        self.live.clear()
+        self.live_all = 0
+        self.counted, delete = self.hooks()
+        for root in self.classes:
+            root.__del__ = delete
+            for cls in subclasses(root):
+                self.track(cls)
+        obj.MonkeyObj.__init_subclass__ = classmethod(lambda cls, **kwargs: self.track(cls))
+        self.running = True
+
+    def stop(self) -> None:
+        instrument.unwrap(self)
+        del obj.MonkeyObj.__init_subclass__
+        for root in self.classes:
+            del root.__del__
+        self.running = False
+
+    def track(self, cls: type) -> None:
+        """给定义了 __init__ 的类加上计数的包装, 其他类继承基类的包装"""
+        if cls in self.classes or "__init__" in vars(cls):
+            instrument.wrap(self, cls, "__init__", self.counted)
+
+    def hooks(self):
+        live, total, peak = self.live, self.total, self.peak
+        objects, sites = self.objects, self.sites
+        getframe = sys._getframe
+
+        def counted(init):
+            def init_counted(self_, *args, **kwargs):
+                # 子类的 __init__ 通过 super() 调用基类的 __init__ 时对象已经计数
+                key = id(self_)
+                if not self.paused and key not in objects:
+                    name = type(self_).__name__
+                    site = allocation_site(getframe(1))
+                    objects[key] = (name, site)
+                    total[name] = total.get(name, 0) + 1
+                    n = live[name] = live.get(name, 0) + 1
+                    if n > peak.get(name, 0):
+                        peak[name] = n
+                    self.live_all += 1
+                    if self.live_all > self.peak_all:
+                        self.peak_all = self.live_all
+                    counts = sites.get(site)
+                    if counts is None:
+                        counts = sites[site] = {}
+                    counts[name] = counts.get(name, 0) + 1
+                init(self_, *args, **kwargs)
+            return init_counted
+
+        def delete(self_):
+            entry = objects.pop(id(self_), None)
+            if entry is not None:
+                live[entry[0]] -= 1
+                self.live_all -= 1
+        return counted, delete
+
+    @contextlib.contextmanager
+    def pause(self):
+        """暂停计数, 用于创建统计工具自身使用的对象"""
+        paused = self.paused
+        self.paused = True
+        try:
+            yield
+        finally:
+            self.paused = paused
+
+    def snapshot(self) -> dict:
+        """当前的统计结果, 可以直接保存为 JSON"""
+        live_sites: dict[str, dict[str, int]] = {}
+        for name, site in self.objects.values():
+            counts = live_sites.setdefault(site, {})
+            counts[name] = counts.get(name, 0) + 1
+        return {
+            "types": {
+                name: {
+                    "live": self.live.get(name, 0),
+                    "total": total,
+                    "peak": self.peak.get(name, 0),
+                }
+                for name, total in self.total.items()
+            },
+            "live": self.live_all,
+            "peak": self.peak_all,
+            "live_sites": live_sites,
+            "allocation_sites": self.sites,
+        }
+
+    def report(self, limit: int = 20) -> str:
+        snap = self.snapshot()
+        lines = [f"{'live':>10} {'peak':>10} {'total':>12}  type"]
+        rows = sorted(snap["types"].items(), key=lambda kv: kv[1]["peak"], reverse=True)
+        for name, t in rows:
+            lines.append(f"{t['live']:10d} {t['peak']:10d} {t['total']:12d}  {name}")
+        lines.append(f"{snap['live']:10d} {snap['peak']:10d} {sum(self.total.values()):12d}  all")
+        for title, sites in (("live", snap["live_sites"]), ("allocated", snap["allocation_sites"])):
+            lines.append("")
+            lines.append(f"{title:>10}  position  types")
+            rows = sorted(sites.items(), key=lambda kv: sum(kv[1].values()), reverse=True)
+            for site, counts in rows[:limit]:
+                kinds = ", ".join(f"{name} {n}" for name, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+                lines.append(f"{sum(counts.values()):10d}  {site:<9} {kinds}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+
+
+tracker = MemStats()
+"""解释器使用的统计实例, --memstats 启动它, 内置函数 memstats() 读取它"""
+
+
+def diff(before: dict, after: dict, limit: int = 20) -> str:
+    """比较两个快照, 列出各类型与各位置存活对象数的变化"""
+    lines = [f"{'live':>10} {'peak':>10} {'total':>12}  type"]
+    names = sorted(set(before["types"]) | set(after["types"]))
+    for name in names:
+        b = before["types"].get(name, {})
+        a = after["types"].get(name, {})
+        delta = [a.get(k, 0) - b.get(k, 0) for k in ("live", "peak", "total")]
+        if any(delta):
+            lines.append(f"{delta[0]:+10d} {delta[1]:+10d} {delta[2]:+12d}  {name}")
+    lines.append("")
+    lines.append(f"{'live':>10}  position")
+    changes = []
+    for site in set(before["live_sites"]) | set(after["live_sites"]):
+        b = sum(before["live_sites"].get(site, {}).values())
+        a = sum(after["live_sites"].get(site, {}).values())
+        if a != b:
+            changes.append((a - b, site))
+    changes.sort(key=lambda c: abs(c[0]), reverse=True)
+    for delta, site in changes[:limit]:
+        lines.append(f"{delta:+10d}  {site}")
+    return "\n".join(lines) + "\n"
+
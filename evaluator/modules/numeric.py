@@ -0,0 +1,301 @@
+"""numeric 扩展模块, 提供整数矩阵类型
+
+    import numeric;
+    let m = numeric->from_array([[1, 2], [3, 4]]);
+    numeric->sum(numeric->matmul(m, numeric->transpose(m)));
+
+安装了 NumPy 时矩阵由 int64 的 ndarray 保存, 否则使用纯 python 实现,
+两者的接口相同. 两种实现的区别仅在于溢出: NumPy 的 int64 运算溢出时会回绕,
+纯 python 实现则与 Monkey 的整数一样没有范围限制.
+矩阵不可修改, slice 返回的是原矩阵的视图"""
+import operator as op
+from evaluator import objsys as obj
+from evaluator.extension import MonkeyError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Grid():
+    """纯 python 的二维整数数组, 是 data 中以 (r0, c0) 为起点的 rows x cols 区域"""
+    def __init__(
+            self,
+            data: list[list[int]],
+            r0: int = 0,
+            c0: int = 0,
+            rows: int = None,
+            cols: int = None
+        ):
+        self.data = data
+        self.r0 = r0
+        self.c0 = c0
+        self.rows = len(data) if rows is None else rows
+        self.cols = (len(data[0]) if data else 0) if cols is None else cols
+
+    def tolist(self) -> list[list[int]]:
+        c0, c1 = self.c0, self.c0 + self.cols
+        return [row[c0:c1] for row in self.data[self.r0:self.r0 + self.rows]]
+
+
+class PythonBackend():
+    """纯 python 实现"""
+    name = "python"
+
+    def zeros(self, rows: int, cols: int) -> Grid:
+        return Grid([[0] * cols for _ in range(rows)], rows=rows, cols=cols)
+
+    def from_rows(self, rows: list[list[int]]) -> Grid:
+        return Grid([list(r) for r in rows], rows=len(rows), cols=len(rows[0]) if rows else 0)
+
+    def tolist(self, a: Grid) -> list[list[int]]:
+        return a.tolist()
+
+    def shape(self, a: Grid) -> tuple[int, int]:
+        return a.rows, a.cols
+
+    def get(self, a: Grid, i: int, j: int) -> int:
+        return a.data[a.r0 + i][a.c0 + j]
+
+    def transpose(self, a: Grid) -> Grid:
+        rows = [list(col) for col in zip(*a.tolist())]
+        return Grid(rows, rows=a.cols, cols=a.rows)
+
+    def matmul(self, a: Grid, b: Grid) -> Grid:
+        columns = list(zip(*b.tolist()))
+        rows = [
+            [sum(map(op.mul, row, col)) for col in columns]
+            for row in a.tolist()
+        ]
+        return Grid(rows, rows=a.rows, cols=b.cols)
+
+    def elementwise(self, f, a: Grid, b: Grid | int) -> Grid:
+        if isinstance(b, Grid):
+            rows = [list(map(f, x, y)) for x, y in zip(a.tolist(), b.tolist())]
+        else:
+            rows = [[f(x, b) for x in row] for row in a.tolist()]
+        return Grid(rows, rows=a.rows, cols=a.cols)
+
+    def reduce(self, f, a: Grid, axis: int | None) -> int | Grid:
+        rows = a.tolist()
+        match axis:
+            case None:
+                return f(f(row) for row in rows)
+            case 0:
+                return Grid([[f(col) for col in zip(*rows)]], rows=1, cols=a.cols)
+            case _:
+                return Grid([[f(row)] for row in rows], rows=a.rows, cols=1)
+
+    def has_zero(self, a: Grid) -> bool:
+        return any(0 in row for row in a.tolist())
+
+    def slice(self, a: Grid, rows: range, cols: range) -> Grid:
+        return Grid(a.data, a.r0 + rows.start, a.c0 + cols.start, len(rows), len(cols))
+
+
+class NumpyBackend():
+    """NumPy 实现"""
+    name = "numpy"
+
+    def zeros(self, rows: int, cols: int):
+        return np.zeros((rows, cols), dtype=np.int64)
+
+    def from_rows(self, rows: list[list[int]]):
+        return np.array(rows, dtype=np.int64).reshape(len(rows), -1)
+
+    def tolist(self, a) -> list[list[int]]:
+        return a.tolist()
+
+    def shape(self, a) -> tuple[int, int]:
+        return a.shape
+
+    def get(self, a, i: int, j: int) -> int:
+        return int(a[i, j])
+
+    def transpose(self, a):
+        return a.T
+
+    def matmul(self, a, b):
+        return a @ b
+
+    def elementwise(self, f, a, b):
+        return f(a, b)
+
+    def reduce(self, f, a, axis: int | None):
+        r = reductions[f](a, axis=axis, keepdims=axis is not None)
+        return r if axis is not None else int(r)
+
+    def has_zero(self, a) -> bool:
+        return bool((a == 0).any())
+
+    def slice(self, a, rows: range, cols: range):
+        return a[rows.start:rows.stop, cols.start:cols.stop]
+
+
+if np is not None:
+    backend = NumpyBackend()
+    reductions = {sum: np.sum, max: np.max, min: np.min}
+else:
+    backend = PythonBackend()
+
+
+class Matrix(obj.MonkeyObj):
+    """整数矩阵"""
+    def __init__(self, data):
+        self.data = data
+
+    def shape(self) -> tuple[int, int]:
+        return backend.shape(self.data)
+
+    def type(self) -> obj.ObjectType:
+        return obj.ObjectType.MATRIX_OBJ
+
+    def inspect(self) -> str:
+        rows, cols = self.shape()
+        if rows * cols > 100:
+            return f"<matrix {rows}x{cols}>"
+        return f"matrix({backend.tolist(self.data)})"
+
+    def readable(self) -> str:
+        return self.inspect()
+
+
+type_names = {
+    int: "INTEGER", str: "STRING", bool: "BOOLEAN", type(None): "NULL",
+    list: "ARRAY", dict: "HASH", memoryview: "BYTES",
+}
+"""按 ABI 转换后的参数类型对应的 Monkey 类型名"""
+
+
+def type_name(value) -> str:
+    if isinstance(value, obj.MonkeyObj):
+        return value.type().value
+    return type_names.get(type(value), type(value).__name__)
+
+
+def matrix(value, name: str, arg: int = 1) -> Matrix:
+    if not isinstance(value, Matrix):
+        raise MonkeyError(f"argument {arg} to `{name}` must be MATRIX. got {type_name(value)}")
+    return value
+
+
+def integer(value, name: str, arg: int) -> int:
+    if type(value) is not int:
+        raise MonkeyError(f"argument {arg} to `{name}` must be INTEGER. got {type_name(value)}")
+    return value
+
+
+def operand(a, b, name: str):
+    """检查逐元素运算的操作数, 第二个操作数可以是整数或形状相同的矩阵"""
+    a = matrix(a, name)
+    if type(b) is int:
+        return a.data, b
+    b = matrix(b, name, 2)
+    if a.shape() != b.shape():
+        raise MonkeyError(f"`{name}` shape mismatch: {a.shape()} and {b.shape()}")
+    return a.data, b.data
+
+
+def bounds(start: int, stop: int, size: int) -> range:
+    """按 python 切片的规则截取区间"""
+    start, stop, _ = slice(start, stop).indices(size)
+    return range(start, max(start, stop))
+
+
+def axis_of(axis, name: str) -> int | None:
+    if axis is None:
+        return None
+    if axis not in (0, 1):
+        raise MonkeyError(f"axis to `{name}` must be 0 or 1")
+    return axis
+
+
+def elementwise(name: str, f):
+    """逐元素运算, 第二个操作数可以是整数"""
+    def apply(a, b):
+        return Matrix(backend.elementwise(f, *operand(a, b, name)))
+    return apply
+
+
+def reduction(name: str, f):
+    """归约运算, 省略 axis 时归约为整数, 否则沿 axis 归约为一行或一列"""
+    def apply(m, axis=None):
+        m = matrix(m, name)
+        if f is not sum and 0 in m.shape():
+            raise MonkeyError(f"`{name}` of empty matrix")
+        r = backend.reduce(f, m.data, axis_of(axis, name))
+        return r if type(r) is int else Matrix(r)
+    return apply
+
+
+def register(module) -> None:
+    module.constant("backend", backend.name)
+
+    @module.function
+    def zeros(rows, cols):
+        integer(rows, "zeros", 1)
+        integer(cols, "zeros", 2)
+        if rows < 0 or cols < 0:
+            raise MonkeyError("shape to `zeros` must not be negative")
+        return Matrix(backend.zeros(rows, cols))
+
+    @module.function
+    def from_array(array):
+        if type(array) is not list:
+            raise MonkeyError(f"argument 1 to `from_array` must be ARRAY. got {type_name(array)}")
+        rows = array if array and type(array[0]) is list else [array]
+        width = len(rows[0])
+        for row in rows:
+            if type(row) is not list or len(row) != width:
+                raise MonkeyError("rows of `from_array` must be arrays of the same length")
+            if not all(type(x) is int for x in row):
+                raise MonkeyError("elements of `from_array` must be INTEGER")
+        return Matrix(backend.from_rows(rows))
+
+    @module.function
+    def to_array(m):
+        return backend.tolist(matrix(m, "to_array").data)
+
+    @module.function
+    def shape(m):
+        return list(matrix(m, "shape").shape())
+
+    @module.function
+    def get(m, i, j):
+        rows, cols = matrix(m, "get").shape()
+        if not (0 <= integer(i, "get", 2) < rows and 0 <= integer(j, "get", 3) < cols):
+            return None
+        return backend.get(m.data, i, j)
+
+    @module.function
+    def transpose(m):
+        return Matrix(backend.transpose(matrix(m, "transpose").data))
+
+    @module.function
+    def matmul(a, b):
+        a, b = matrix(a, "matmul"), matrix(b, "matmul", 2)
+        if a.shape()[1] != b.shape()[0]:
+            raise MonkeyError(f"`matmul` shape mismatch: {a.shape()} and {b.shape()}")
+        return Matrix(backend.matmul(a.data, b.data))
+
+    for name, f in (("add", op.add), ("sub", op.sub), ("mul", op.mul)):
+        module.function(elementwise(name, f), name=name)
+
+    @module.function
+    def div(a, b):
+        a, b = operand(a, b, "div")
+        if b == 0 if type(b) is int else backend.has_zero(b):
+            raise MonkeyError("division by zero in `div`")
+        return Matrix(backend.elementwise(op.floordiv, a, b))
+
+    for name, f in (("sum", sum), ("max", max), ("min", min)):
+        module.function(reduction(name, f), name=name)
+
+    @module.function
+    def slice(m, r0, r1, c0=0, c1=None):
+        rows, cols = matrix(m, "slice").shape()
+        c1 = cols if c1 is None else c1
+        for i, v in enumerate((r0, r1, c0, c1)):
+            integer(v, "slice", i + 2)
+        return Matrix(backend.slice(m.data, bounds(r0, r1, rows), bounds(c0, c1, cols)))
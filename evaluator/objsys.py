@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Callable
+from mmap import mmap
+from typing import IO, Callable, Iterable
 from lexer.token import Position
 from parser import ast
 
@@ -10,6 +11,8 @@ class Environment():
     def __init__(self, outer: "Environment" = None):
         self.store: dict[str, MonkeyObj] = {}
         self.outer = outer
+        self.captured: frozenset[str] = None
+        """在该环境中创建的闭包引用到的名字"""
     
     def get(self, name: str):
         obj = self.store.get(name)
@@ -21,6 +24,32 @@ class Environment():
         self.store[name] = val
         return val
 
+    def capture(self, names: frozenset[str]) -> None:
+        """记录一个在该环境中创建的闭包所引用的名字.
+        闭包通过 outer 链也能访问外层环境 (如循环体所在的函数帧) 中的名字,
+        所以这些名字同样记录在所有外层环境上. 环境的 outer 在创建后不变,
+        某一层已经记录过全部名字时, 更外层也一定记录过了"""
+        env = self
+        while env is not None:
+            captured = env.captured
+            if captured is None:
+                env.captured = names
+            elif names <= captured:
+                return
+            else:
+                env.captured = captured | names
+            env = env.outer
+
+    def release(self) -> None:
+        """环境对应的作用域执行结束后调用, 只保留闭包引用到的绑定,
+        使其余的值以及 "函数 -> 环境 -> 函数" 的引用环能尽早被回收"""
+        captured = self.captured
+        if captured is None:
+            return
+        store = self.store
+        for name in [n for n in store if n not in captured]:
+            del store[name]
+
 
 class ObjectType(Enum):
     INTEGER_OBJ         = "INTEGER"
@@ -35,10 +64,25 @@ class ObjectType(Enum):
     HASH_OBJ            = "HASH"
     HASHPAIR_OBJ        = "HASHPAIR"
     MODULE_OBJ          = "MODULE_OBJ"
+    STRING_BUILDER_OBJ  = "STRING_BUILDER"
+    ITERATOR_OBJ        = "ITERATOR"
+    FILE_OBJ            = "FILE"
+    BYTES_OBJ           = "BYTES"
+    STRUCT_OBJ          = "STRUCT"
+    RECORD_OBJ          = "RECORD"
+    MATRIX_OBJ          = "MATRIX"
 
 
 class MonkeyObj(ABC):
     """Monkey 类型接口"""
+    __slots__ = ()
+    """使声明了 __slots__ 的子类 (如 Record) 的实例不带 __dict__"""
+
+    def __bool__(self) -> bool:
+        """python 中的真值恒为真, 定义了 __len__ 的对象 (如空的 BYTES) 不会被当作不存在.
+        Monkey 的真值判断见 evaluator.is_truthy"""
+        return True
+
     @abstractmethod
     def type(self) -> ObjectType:...
 
@@ -157,17 +201,22 @@ class Function(MonkeyObj):
             self,
             parameters: list[ast.Identifier] = None,
             body: ast.BlockStatement = None,
-            env: Environment = None
+            env: Environment = None,
+            name: str = ''
         ):
         if parameters:
             self.parameters = parameters
         else:
             self.parameters: list[ast.Identifier] = []
         self.body = body
+        self.name = name
+        """定义函数的 let 语句中的名字, 匿名函数为空字符串"""
         if env:
             self.env = env
         else:
             self.env: Environment = Environment()
+        self.calls = 0
+        """被调用的次数, 用于判断是否需要编译"""
     
     def type(self):
         return ObjectType.FUNCTION_OBJ
@@ -181,9 +230,73 @@ class Function(MonkeyObj):
 
 
 class String(MonkeyObj, Hashable):
+    """字符串.
+
+    拼接得到的长字符串以 rope 的形式保存: 片段存放在 parts 列表中,
+    多个字符串可以共享同一个列表, 各自只使用前 count 个片段.
+    value 在第一次被访问 (取下标、哈希、输出等) 时才展平并缓存,
+    因此反复在末尾拼接的总开销与结果长度成线性关系"""
+    ROPE_MIN = 256
+    """拼接结果短于该长度时直接生成普通字符串"""
+
     def __init__(self, value: str = ''):
         self.value = value
-    
+
+    @staticmethod
+    def concat(left: "String", right: "String") -> "String":
+        """拼接两个字符串"""
+        ld = left.__dict__
+        rd = right.__dict__
+        lv = ld.get('value')
+        rv = rd.get('value')
+        size = (len(lv) if lv is not None else ld['size']) + (
+            len(rv) if rv is not None else rd['size'])
+        if size < String.ROPE_MIN:
+            return String(left.value + right.value)
+        parts = ld.get('parts')
+        if parts is None:
+            parts = [left.value]
+            count = 1
+        else:
+            count = ld['count']
+            if len(parts) != count:
+                parts = parts[:count]
+        tail = None if rv is not None else rd.get('parts')
+        if tail is None:
+            tail = [right.value]
+            parts.append(tail[0])
+        else:
+            tail = tail[:rd['count']]
+            parts.extend(tail)
+        added = len(tail)
+        # 列表可能同时被其他拼接扩展, 此时退回到复制
+        if len(parts) != count + added:
+            parts = parts[:count] + tail
+        # 经过 __init__ 构造, 使 memstats 能记录到 rope
+        rope = String()
+        rope.__dict__ = {'parts': parts, 'count': count + added, 'size': size}
+        return rope
+
+    def __getattr__(self, name: str):
+        # 只有尚未展平的 rope 没有 value 属性
+        if name != 'value':
+            raise AttributeError(name)
+        state = self.__dict__
+        parts = state.get('parts')
+        if parts is None:
+            # 已被其他线程展平
+            return state['value']
+        value = ''.join(parts[:self.count])
+        self.value = value
+        state.pop('parts', None)
+        return value
+
+    def length(self) -> int:
+        """字符串长度, 不会触发展平"""
+        if 'value' in self.__dict__:
+            return len(self.value)
+        return self.size
+
     def type(self):
         return ObjectType.STRING_OBJ
 
@@ -218,6 +331,147 @@ class Python(MonkeyObj):
         return f"{self.name}<py>(...){{...}}"
 
 
+class StringBuilder(MonkeyObj):
+    """字符串构造器, 收集片段并在 build 时一次性拼接"""
+    def __init__(self):
+        self.parts: list[str] = []
+
+    def type(self) -> ObjectType:
+        return ObjectType.STRING_BUILDER_OBJ
+
+    def inspect(self) -> str:
+        return f"<string builder at {hex(id(self))}>"
+
+    def readable(self) -> str:
+        return f"<string builder at {hex(id(self))}>"
+
+
+class Iterator(MonkeyObj):
+    """惰性迭代器, 包装一个产生 MonkeyObj 的 python 迭代器, 只能遍历一次.
+    来源产生 ERROR 对象时停止遍历, 该错误记录在 error 中"""
+    def __init__(self, name: str = '', source: Iterable[MonkeyObj] = ()):
+        self.name = name
+        self.source = source
+        self.error: Error = None
+
+    def __iter__(self):
+        for item in self.source:
+            if type(item) is Error:
+                self.error = item
+                return
+            yield item
+
+    def type(self) -> ObjectType:
+        return ObjectType.ITERATOR_OBJ
+
+    def inspect(self) -> str:
+        return f"<{self.name} iterator at {hex(id(self))}>"
+
+    def readable(self) -> str:
+        return f"<{self.name} iterator at {hex(id(self))}>"
+
+
+class File(MonkeyObj):
+    """文件对象"""
+    def __init__(self, path: str = '', mode: str = 'r', file: IO = None):
+        self.path = path
+        self.mode = mode
+        self.file = file
+
+    def type(self) -> ObjectType:
+        return ObjectType.FILE_OBJ
+
+    def inspect(self) -> str:
+        state = "closed" if self.file.closed else "open"
+        return f"<{state} file '{self.path}' mode '{self.mode}'>"
+
+    def readable(self) -> str:
+        return self.inspect()
+
+
+class Bytes(MonkeyObj):
+    """字节串对象, 是底层 bytes 或 mmap 中 [start, stop) 区间的只读视图,
+    切片只产生新的视图而不复制数据"""
+    CHUNK = 1 << 16
+    """遍历时每次从底层数据中复制出的字节数"""
+
+    def __init__(
+            self,
+            base: bytes | mmap = b'',
+            start: int = 0,
+            stop: int = None
+        ):
+        self.base = base
+        self.start = start
+        self.stop = len(base) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __iter__(self):
+        """逐个产生字节的整数值, 底层数据按块读取, 内存占用与总长度无关"""
+        base, stop, chunk = self.base, self.stop, self.CHUNK
+        for i in range(self.start, stop, chunk):
+            yield from base[i:min(i + chunk, stop)]
+
+    def slice(self, start: int, stop: int) -> "Bytes":
+        """按 python 切片的规则截取视图"""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return Bytes(self.base, self.start + start, self.start + max(start, stop))
+
+    def tobytes(self) -> bytes:
+        return self.base[self.start:self.stop]
+
+    def type(self) -> ObjectType:
+        return ObjectType.BYTES_OBJ
+
+    def inspect(self) -> str:
+        if len(self) <= 32:
+            return repr(self.tobytes())
+        return f"<bytes of length {len(self)}>"
+
+    def readable(self) -> str:
+        return self.inspect()
+
+
+class StructType(MonkeyObj):
+    """结构体类型, 保存所有记录共享的字段布局, 调用它可以创建记录"""
+    def __init__(self, name: str = '', fields: list[str] = None):
+        self.name = name
+        self.fields = fields if fields else []
+        self.slots: dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        """字段名到记录中槽位下标的映射"""
+
+    def type(self) -> ObjectType:
+        return ObjectType.STRUCT_OBJ
+
+    def inspect(self) -> str:
+        return f"<struct {self.name} {{ {', '.join(self.fields)} }}>"
+
+    def readable(self) -> str:
+        return self.inspect()
+
+
+class Record(MonkeyObj):
+    """结构体实例, 字段值按结构体的字段布局依次存放在 values 中"""
+    __slots__ = ("struct", "values")
+
+    def __init__(self, struct: StructType = None, values: list[MonkeyObj] = None):
+        self.struct = struct
+        self.values = values
+
+    def type(self) -> ObjectType:
+        return ObjectType.RECORD_OBJ
+
+    def inspect(self) -> str:
+        fields = [f"{f}:{v.inspect()}" for f, v in zip(self.struct.fields, self.values)]
+        return f"{self.struct.name}{{{', '.join(fields)}}}"
+
+    def readable(self) -> str:
+        fields = [f"{f}:{v.readable()}" for f, v in zip(self.struct.fields, self.values)]
+        return f"{self.struct.name}{{{', '.join(fields)}}}"
+
+
 class Array(MonkeyObj):
     """数组对象"""
     def __init__(self, elements: list[MonkeyObj] = None):
@@ -0,0 +1,127 @@
+"""Monkey 函数级别的确定性性能分析
+
+start 时通过 evaluator.instrument 给求值器模块中的 apply_function 与所有内置函数
+加上记录耗时的包装, stop 时移除, 所以不进行性能分析时没有任何额外开销.
+树遍历求值器与 JIT 编译的代码都通过模块全局的 apply_function 调用函数,
+因此两者的调用都会被记录.
+
+函数以定义它的 let 语句中的名字与函数体的位置标识, 如 fib@1:20,
+匿名函数显示为 <fn>@行:列"""
+import time
+import evaluator
+from evaluator import instrument
+from evaluator import objsys as obj
+
+
+def function_label(func: obj.Function) -> str:
+    pos = func.body.TokenPos()
+    return f"{func.name or '<fn>'}@{pos.y}:{pos.x}"
+
+
+class Profiler():
+    """记录每个函数的调用次数、自身耗时与累计耗时, 以及调用栈的自身耗时"""
+    def __init__(self):
+        self.stats: dict[str, list] = {}
+        """函数 -> [调用次数, 自身耗时, 累计耗时], 耗时单位为秒"""
+        self.builtins: dict[str, list] = {}
+        """内置函数 -> [调用次数, 耗时]"""
+        self.stacks: dict[str, float] = {}
+        """以 ; 连接的调用栈 -> 栈顶函数的自身耗时"""
+        self.path: list[str] = []
+        self.children: list[float] = []
+        """调用栈中每一层的子调用耗时之和"""
+        self.active: dict[str, int] = {}
+        """正在执行的各函数的层数, 递归调用只在最外层计入累计耗时"""
+
+    def start(self) -> None:
+        instrument.wrap(self, evaluator, "apply_function", self.wrap_function)
+        for py in evaluator.builtins.functions():
+            instrument.wrap(self, py, "func", lambda func, name=py.name: self.wrap_builtin(name, func))
+
+    def stop(self) -> None:
+        instrument.unwrap(self)
+
+    def enter(self, label: str) -> None:
+        self.path.append(label)
+        self.children.append(0.0)
+        self.active[label] = self.active.get(label, 0) + 1
+
+    def leave(self, label: str, elapsed: float) -> float:
+        """结束一次调用, 返回这次调用的自身耗时"""
+        own = elapsed - self.children.pop()
+        if self.children:
+            self.children[-1] += elapsed
+        stack = ";".join(self.path)
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + own
+        self.path.pop()
+        self.active[label] -= 1
+        return own
+
+    def wrap_function(self, apply_function):
+        clock = time.perf_counter
+        stats = self.stats
+        active = self.active
+
+        def profiled(func: obj.Function, args: list[obj.MonkeyObj]) -> obj.MonkeyObj:
+            label = function_label(func)
+            self.enter(label)
+            start = clock()
+            try:
+                return apply_function(func, args)
+            finally:
+                elapsed = clock() - start
+                own = self.leave(label, elapsed)
+                entry = stats.get(label)
+                if entry is None:
+                    entry = stats[label] = [0, 0.0, 0.0]
+                entry[0] += 1
+                entry[1] += own
+                if not active[label]:
+                    entry[2] += elapsed
+        return profiled
+
+    def wrap_builtin(self, name: str, func):
+        clock = time.perf_counter
+        label = f"<builtin {name}>"
+        entry = self.builtins.setdefault(name, [0, 0.0])
+
+        def profiled(pos, args):
+            self.enter(label)
+            start = clock()
+            try:
+                return func(pos, args)
+            finally:
+                elapsed = clock() - start
+                self.leave(label, elapsed)
+                entry[0] += 1
+                entry[1] += elapsed
+        return profiled
+
+    def table(self) -> str:
+        """按自身耗时排序的文本报告"""
+        lines = [f"{'calls':>10} {'self ms':>12} {'cum ms':>12}  function"]
+        rows = sorted(self.stats.items(), key=lambda kv: kv[1][1], reverse=True)
+        for label, (calls, own, cum) in rows:
+            lines.append(f"{calls:10d} {own * 1000:12.3f} {cum * 1000:12.3f}  {label}")
+        lines.append("")
+        lines.append(f"{'calls':>10} {'time ms':>12}  builtin")
+        rows = sorted(self.builtins.items(), key=lambda kv: kv[1][0], reverse=True)
+        for name, (calls, elapsed) in rows:
+            if calls:
+                lines.append(f"{calls:10d} {elapsed * 1000:12.3f}  {name}")
+        return "\n".join(lines) + "\n"
+
+    def collapsed(self) -> str:
+        """flamegraph.pl 等工具使用的折叠调用栈格式, 数值为微秒"""
+        return "".join(
+            f"{stack} {round(own * 1e6)}\n"
+            for stack, own in sorted(self.stacks.items())
+        )
+
+    def write(self, prefix: str) -> list[str]:
+        """把报告写入 prefix.txt 与 prefix.collapsed, 返回写入的文件"""
+        files = [f"{prefix}.txt", f"{prefix}.collapsed"]
+        for path, content in zip(files, (self.table(), self.collapsed())):
+            with open(path, "w") as f:
+                f.write(content)
+        return files
@@ -3,7 +3,7 @@ from lexer import Lexer
 from parser import Parser
 from parser.repl import REPL as RPPL
 from evaluator.objsys import Environment
-from evaluator.builtins import NULL
+from evaluator.builtins import NULL, output
 
 
 PROMPT = """\
@@ -25,6 +25,7 @@ class REPL():
     def run(self) -> None:
         print(PROMPT)
         while True:
+            output.flush()
             code = input(">>> ")
             self.eval_print(code)
     
@@ -36,4 +37,4 @@ class REPL():
             return
         evaluated = evaluator.Eval(program, self.env)
         if evaluated != NULL:
-            print(evaluated.inspect())
+            output.write(evaluated.inspect() + "\n")
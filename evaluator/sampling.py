@@ -0,0 +1,186 @@
+"""采样式性能分析
+
+按固定的间隔中断程序 (支持时使用 signal.setitimer 按 CPU 时间计时, 否则使用
+后台线程), 从 python 调用栈中读出当前的 Monkey 调用栈:
+
+* apply_function 的栈帧对应一次 Monkey 函数调用, 局部变量 func 即被调用的函数
+* 最内层的 Eval 栈帧正在求值的节点 node 给出当前执行到的源码位置
+
+python 解释器维护的调用栈本身就是求值器的影子栈, 因此求值器中不需要额外的记录,
+不采样时没有任何开销. JIT 编译的函数中没有 Eval 栈帧, 样本只能记在函数体的位置上,
+与 stats 一样采样期间会关闭 JIT.
+
+为了降低每次采样的开销, 采样时记住栈上每个 apply_function 栈帧对应的 Monkey 调用栈.
+下一次采样从栈顶向下遍历时遇到仍在栈上的这类栈帧即可停止, 只有两次采样之间新进入的调用
+才需要读取代价较高的 f_locals"""
+import signal
+import sys
+import threading
+import evaluator
+from lexer.token import Position
+from evaluator import jit
+from evaluator.profile import function_label
+
+
+EVAL, APPLY = 1, 2
+"""栈帧的种类, 其他栈帧为 None"""
+
+
+def code_kind(code) -> int | None:
+    if code.co_filename != evaluator.__file__:
+        return None
+    match code.co_name:
+        case "Eval":
+            return EVAL
+        case "apply_function":
+            return APPLY
+    return None
+
+
+class Sampler():
+    """统计每个源码位置、每个函数以及每个调用栈被采样到的次数"""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.total = 0
+        self.positions: dict[tuple[int, int], int] = {}
+        """(行, 列) -> 样本数"""
+        self.functions: dict[str, int] = {}
+        """函数 -> 位于栈顶的样本数"""
+        self.stacks: dict[str, int] = {}
+        """以 ; 连接的调用栈 -> 样本数"""
+        self.kinds: dict[int, tuple] = {}
+        """id(code 对象) -> (code 对象, 栈帧的种类), code 对象的哈希要计算其内容, 因此按 id 查找"""
+        self.calls: dict = {}
+        """上一次采样时栈上的 apply_function 栈帧 -> (从该调用向外的调用栈, 函数体的位置, 外层调用的栈帧)"""
+        self.thread: threading.Thread = None
+        self.running = False
+        self.previous_handler = None
+        self.jit_enabled: bool | None = None
+
+    def start(self) -> None:
+        self.jit_enabled = jit.enabled
+        jit.enabled = False
+        self.running = True
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self.previous_handler = signal.signal(signal.SIGPROF, self.handler)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            target = threading.main_thread().ident
+            self.thread = threading.Thread(target=self.poll, args=(target,), daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler or signal.SIG_DFL)
+        self.calls = {}
+        if self.jit_enabled is not None:
+            jit.enabled = self.jit_enabled
+            self.jit_enabled = None
+
+    def handler(self, signum, frame) -> None:
+        self.sample(frame)
+
+    def poll(self, target: int) -> None:
+        event = threading.Event()
+        while self.running and not event.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                self.sample(frame)
+
+    def sample(self, frame) -> None:
+        """记录一个样本, frame 为被中断的 python 栈帧"""
+        pos: Position = None
+        entered: list[tuple] = []
+        """上一次采样之后进入的调用 (栈帧, 函数, 函数体的位置), 内层在前"""
+        kinds, previous = self.kinds, self.calls
+        known = None
+        while frame is not None:
+            code = frame.f_code
+            entry = kinds.get(id(code))
+            if entry is None:
+                entry = kinds[id(code)] = (code, code_kind(code))
+            kind = entry[1]
+            if kind == EVAL:
+                if pos is None and not entered:
+                    node = frame.f_locals.get("node")
+                    if node is not None:
+                        pos = node.TokenPos()
+            elif kind == APPLY:
+                # 已记录的调用之外的栈与上一次采样时相同, 不必继续遍历
+                known = previous.get(frame)
+                if known is not None:
+                    break
+                func = frame.f_locals.get("func")
+                if func is not None:
+                    entered.append((frame, function_label(func), func.body.TokenPos()))
+            frame = frame.f_back
+
+        calls = {}
+        stack, parent = (), None
+        if known is not None:
+            stack, parent = known[0], frame
+            while frame is not None:
+                calls[frame] = previous[frame]
+                frame = previous[frame][2]
+        for frame, label, body in reversed(entered):
+            stack = (label, *stack)
+            calls[frame] = (stack, body, parent)
+            parent = frame
+        self.calls = calls
+        if pos is None:
+            if entered:
+                pos = entered[0][2]
+            elif known is not None:
+                pos = known[1]
+        if pos is None:
+            return
+        self.total += 1
+        key = (pos.y, pos.x)
+        self.positions[key] = self.positions.get(key, 0) + 1
+        top = stack[0] if stack else "<main>"
+        self.functions[top] = self.functions.get(top, 0) + 1
+        path = ";".join(["<main>", *reversed(stack)])
+        self.stacks[path] = self.stacks.get(path, 0) + 1
+
+    def report(self, source: str = None, limit: int = 20) -> str:
+        """热点报告, 给出源码时同时显示对应的源码行"""
+        if not self.total:
+            return "no samples\n"
+        lines = source.splitlines() if source else []
+        out = [f"{self.total} samples, interval {self.interval * 1000:g} ms", ""]
+
+        by_line: dict[int, int] = {}
+        for (y, _), n in self.positions.items():
+            by_line[y] = by_line.get(y, 0) + n
+        out.append(f"{'samples':>8} {'%':>6}  line")
+        for y, n in sorted(by_line.items(), key=lambda kv: kv[1], reverse=True)[:limit]:
+            text = lines[y - 1].strip() if 0 < y <= len(lines) else ""
+            out.append(f"{n:8d} {n * 100 / self.total:6.1f}  {y:<5} {text}")
+
+        out.append("")
+        out.append(f"{'samples':>8} {'%':>6}  position")
+        for (y, x), n in sorted(self.positions.items(), key=lambda kv: kv[1], reverse=True)[:limit]:
+            out.append(f"{n:8d} {n * 100 / self.total:6.1f}  {y}:{x}")
+
+        out.append("")
+        out.append(f"{'samples':>8} {'%':>6}  function (self)")
+        for label, n in sorted(self.functions.items(), key=lambda kv: kv[1], reverse=True)[:limit]:
+            out.append(f"{n:8d} {n * 100 / self.total:6.1f}  {label}")
+        return "\n".join(out) + "\n"
+
+    def collapsed(self) -> str:
+        """flamegraph.pl 等工具使用的折叠调用栈格式, 数值为样本数"""
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.stacks.items()))
+
+    def write(self, prefix: str, source: str = None) -> list[str]:
+        """把报告写入 prefix.txt 与 prefix.collapsed, 返回写入的文件"""
+        files = [f"{prefix}.txt", f"{prefix}.collapsed"]
+        for path, content in zip(files, (self.report(source), self.collapsed())):
+            with open(path, "w") as f:
+                f.write(content)
+        return files
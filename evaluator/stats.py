@@ -0,0 +1,134 @@
+"""求值过程的计数统计
+
+start 时通过 evaluator.instrument 给求值器模块中的 Eval、apply_function 与所有内置函数
+加上计数的包装, stop 时移除, 所以不统计时没有任何额外开销. Eval 的递归调用与各个
+eval_* 函数都通过模块全局的名字调用 Eval, 因此每个被求值的节点都会被计数.
+JIT 编译的函数不经过 Eval, 统计期间会关闭 JIT"""
+import time
+import evaluator
+from evaluator import instrument, jit
+from evaluator import objsys as obj
+from evaluator.builtins import NULL, output, regex_cache_stats
+from lexer import TokenStream, tokenize
+from parser import Parser
+from parser.repl import REPL as RPPL
+
+
+PHASES = ("lex", "parse", "eval")
+
+
+def env_depth(env: obj.Environment) -> int:
+    """环境链的长度"""
+    depth = 0
+    while env is not None:
+        depth += 1
+        env = env.outer
+    return depth
+
+
+class Stats():
+    """记录各类节点的求值次数、各阶段耗时、环境链的最大深度以及函数调用次数"""
+    def __init__(self):
+        self.nodes: dict[str, int] = {}
+        """节点类型 -> 求值次数"""
+        self.phases: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        """阶段 -> 耗时, 单位为秒"""
+        self.calls = 0
+        """apply_function 的调用次数"""
+        self.max_depth = 0
+        self.builtins: dict[str, int] = {}
+        """内置函数 -> 调用次数"""
+        self.jit_enabled: bool | None = None
+        """start 之前 JIT 是否开启, 未在统计时为 None"""
+
+    def start(self) -> None:
+        self.jit_enabled = jit.enabled
+        jit.enabled = False
+        instrument.wrap(self, evaluator, "Eval", self.wrap_eval)
+        instrument.wrap(self, evaluator, "apply_function", self.wrap_function)
+        for py in evaluator.builtins.functions():
+            instrument.wrap(self, py, "func", lambda func, name=py.name: self.wrap_builtin(name, func))
+
+    def stop(self) -> None:
+        instrument.unwrap(self)
+        if self.jit_enabled is not None:
+            jit.enabled = self.jit_enabled
+            self.jit_enabled = None
+
+    def wrap_eval(self, Eval):
+        nodes = self.nodes
+        last_env = None
+
+        def counted(node, env: obj.Environment) -> obj.MonkeyObj:
+            nonlocal last_env
+            name = type(node).__name__
+            nodes[name] = nodes.get(name, 0) + 1
+            # 连续的节点大多在同一个环境中求值, 只在环境变化时重新计算深度
+            if env is not last_env:
+                last_env = env
+                depth = env_depth(env)
+                if depth > self.max_depth:
+                    self.max_depth = depth
+            return Eval(node, env)
+        return counted
+
+    def wrap_function(self, apply_function):
+        def counted(func: obj.Function, args: list[obj.MonkeyObj]) -> obj.MonkeyObj:
+            self.calls += 1
+            return apply_function(func, args)
+        return counted
+
+    def wrap_builtin(self, name: str, func):
+        builtins = self.builtins
+
+        def counted(pos, args):
+            builtins[name] = builtins.get(name, 0) + 1
+            return func(pos, args)
+        return counted
+
+    def timed(self, phase: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.phases[phase] += time.perf_counter() - start
+
+    def eval_print(self, env: obj.Environment, code: str) -> None:
+        """与求值器 REPL 的 eval_print 相同, 但分别记录词法分析、语法分析与求值的耗时"""
+        tokens = self.timed("lex", tokenize, code)
+        p = Parser(TokenStream(tokens))
+        program = self.timed("parse", p.parse_program)
+        if len(p.errors):
+            RPPL.raise_error(p.errors)
+            return
+        evaluated = self.timed("eval", evaluator.Eval, program, env)
+        if evaluated != NULL:
+            output.write(evaluated.inspect() + "\n")
+
+    def as_dict(self) -> dict:
+        return {
+            "phases_ms": {k: v * 1000 for k, v in self.phases.items()},
+            "nodes": dict(sorted(self.nodes.items(), key=lambda kv: kv[1], reverse=True)),
+            "evaluations": sum(self.nodes.values()),
+            "apply_function": self.calls,
+            "max_env_depth": self.max_depth,
+            "builtins": dict(sorted(self.builtins.items(), key=lambda kv: kv[1], reverse=True)),
+            "regex_cache": regex_cache_stats(),
+        }
+
+    def report(self) -> str:
+        data = self.as_dict()
+        lines = ["phase ms"]
+        for phase, ms in data["phases_ms"].items():
+            lines.append(f"  {phase:<8} {ms:12.3f}")
+        lines.append(f"evaluations {data['evaluations']}")
+        for name, n in data["nodes"].items():
+            lines.append(f"  {name:<24} {n:12d}")
+        lines.append(f"apply_function calls {data['apply_function']}")
+        lines.append(f"max environment depth {data['max_env_depth']}")
+        lines.append("builtin calls")
+        for name, n in data["builtins"].items():
+            lines.append(f"  {name:<24} {n:12d}")
+        cache = data["regex_cache"]
+        lines.append(f"regex cache hits {cache['hits']}, misses {cache['misses']}, size {cache['size']}/{cache['maxsize']}")
+        return "\n".join(lines) + "\n"
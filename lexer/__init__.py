@@ -133,11 +133,45 @@ class Lexer():
             case '/':
                 tok = Token(TokenType.SLASH, ch, pos)
             
+            case '%':
+                tok = Token(TokenType.PERCENT, ch, pos)
+            
             case '<':
-                tok = Token(TokenType.LT, ch, pos)
+                if self.peek_char() == '=':
+                    self.read_char()
+                    tok = Token(TokenType.LT_EQ, ch + self.__current, pos)
+                elif self.peek_char() == '<':
+                    self.read_char()
+                    tok = Token(TokenType.SHL, ch + self.__current, pos)
+                else:
+                    tok = Token(TokenType.LT, ch, pos)
             
             case '>':
-                tok = Token(TokenType.GT, ch, pos)
+                if self.peek_char() == '=':
+                    self.read_char()
+                    tok = Token(TokenType.GT_EQ, ch + self.__current, pos)
+                elif self.peek_char() == '>':
+                    self.read_char()
+                    tok = Token(TokenType.SHR, ch + self.__current, pos)
+                else:
+                    tok = Token(TokenType.GT, ch, pos)
+            
+            case '&':
+                if self.peek_char() == '&':
+                    self.read_char()
+                    tok = Token(TokenType.AND, ch + self.__current, pos)
+                else:
+                    tok = Token(TokenType.BIT_AND, ch, pos)
+            
+            case '|':
+                if self.peek_char() == '|':
+                    self.read_char()
+                    tok = Token(TokenType.OR, ch + self.__current, pos)
+                else:
+                    tok = Token(TokenType.BIT_OR, ch, pos)
+            
+            case '^':
+                tok = Token(TokenType.BIT_XOR, ch, pos)
             
             case ',':
                 tok = Token(TokenType.COMMA, ch, pos)
@@ -187,3 +221,26 @@ class Lexer():
         self.read_char()
         return tok
 
+
+class TokenStream():
+    """按顺序重放预先得到的 token, 使语法分析的计时不包含词法分析"""
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens
+        self.index = 0
+
+    def next_token(self) -> Token:
+        tok = self.tokens[self.index]
+        if self.index < len(self.tokens) - 1:
+            self.index += 1
+        return tok
+
+
+def tokenize(code: str) -> list[Token]:
+    """把源码完整地切分为 token, 以 EOF 结尾"""
+    lexer = Lexer(code)
+    tokens = []
+    while True:
+        tok = lexer.next_token()
+        tokens.append(tok)
+        if tok.type == TokenType.EOF:
+            return tokens
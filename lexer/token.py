@@ -20,6 +20,16 @@ class TokenType(Enum):
     GT = '>'
     EQ = '=='
     NOT_EQ = '!='
+    PERCENT = '%'
+    LT_EQ = '<='
+    GT_EQ = '>='
+    BIT_AND = '&'
+    BIT_OR = '|'
+    BIT_XOR = '^'
+    SHL = '<<'
+    SHR = '>>'
+    AND = '&&'
+    OR = '||'
     COLON = ':'
     VISIT = '->'
     # 分隔符
@@ -41,6 +51,10 @@ class TokenType(Enum):
     RETURN = 'RETURN'
     IMPORT = 'IMPORT'
     NULL = 'NULL'
+    WHILE = 'WHILE'
+    FOR = 'FOR'
+    IN = 'IN'
+    STRUCT = 'STRUCT'
 
 
 class Position():
@@ -71,6 +85,10 @@ keywords: dict[str, TokenType] = {
     'return':   TokenType.RETURN,
     'import':   TokenType.IMPORT,
     'null':     TokenType.NULL,
+    'while':    TokenType.WHILE,
+    'for':      TokenType.FOR,
+    'in':       TokenType.IN,
+    'struct':   TokenType.STRUCT,
 }
 
 
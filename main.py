@@ -11,9 +11,11 @@ def run_parser_repl(mode: str):
     repl.run()
 
 
-def run_evaluator_repl():
+def run_evaluator_repl(stats=None):
     from evaluator.repl import REPL
     repl = REPL()
+    if stats:
+        repl.eval_print = lambda code: stats.eval_print(repl.env, code)
     repl.run()
 
 
@@ -30,10 +32,13 @@ def parse_code(code: str, mode: str):
     repl.eval_print(code)
 
 
-def eval_code(code: str):
+def eval_code(code: str, stats=None):
     from evaluator.repl import REPL
     repl = REPL()
-    repl.eval_print(code)
+    if stats:
+        stats.eval_print(repl.env, code)
+    else:
+        repl.eval_print(code)
 
 
 if __name__ == "__main__":
@@ -42,8 +47,116 @@ if __name__ == "__main__":
     parser.add_argument("file", nargs="?")
     parser.add_argument("-r", "--run", default="eval")
     parser.add_argument("-m", "--mode", default="tostring")
+    parser.add_argument("--no-jit", action="store_true")
+    parser.add_argument("--buffered-output", action="store_true")
+    parser.add_argument("--profile", nargs="?", const="monkey-profile", metavar="PREFIX",
+                        help="profile Monkey functions, write PREFIX.txt and PREFIX.collapsed")
+    parser.add_argument("--sample", nargs="?", const="monkey-sample", metavar="PREFIX",
+                        help="sample the Monkey call stack, write PREFIX.txt and PREFIX.collapsed")
+    parser.add_argument("--sample-interval", type=float, default=10.0, metavar="MS",
+                        help="sampling interval in milliseconds, default 10")
+    parser.add_argument("--stats", action="store_true",
+                        help="count evaluated nodes and calls, time each phase, report to stderr")
+    parser.add_argument("--stats-json", metavar="PATH", help="write the --stats report as JSON")
+    parser.add_argument("--memstats", nargs="?", const="monkey-memstats.json", metavar="PATH",
+                        help="count Monkey objects by type and source position, write a heap snapshot to PATH")
+    parser.add_argument("--batch", metavar="DIR|GLOB",
+                        help="run every script in a directory or matching a glob across a process pool")
+    parser.add_argument("--workers", type=int, help="--batch worker processes, default the CPU count")
+    parser.add_argument("--timeout", type=float, help="--batch per-script timeout in seconds")
+    parser.add_argument("--summary", default="batch-summary.jsonl", metavar="PATH",
+                        help="--batch JSONL summary, default batch-summary.jsonl")
+    parser.add_argument("--memstats-diff", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two heap snapshots written by --memstats")
 
     args = parser.parse_args()
+    if (args.stats or args.stats_json) and args.run in ("lexer", "parser"):
+        parser.error("--stats and --stats-json only work with --run eval")
+
+    if args.batch:
+        import sys
+        from evaluator.batch import run_batch
+        sys.exit(run_batch(args.batch, args.workers, args.timeout, args.summary, args.no_jit))
+
+    if args.memstats_diff:
+        import json
+        import sys
+        from evaluator.memstats import diff
+        snapshots = []
+        for path in args.memstats_diff:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        sys.stdout.write(diff(*snapshots))
+        sys.exit()
+
+    if args.no_jit:
+        from evaluator import jit
+        jit.enabled = False
+
+    if args.buffered_output:
+        from evaluator.builtins import output
+        output.buffered()
+
+    if args.profile:
+        import atexit
+        import sys
+        from evaluator.profile import Profiler
+        profiler = Profiler()
+        profiler.start()
+
+        @atexit.register
+        def write_profile():
+            profiler.stop()
+            files = profiler.write(args.profile)
+            print(f"profile written to {', '.join(files)}", file=sys.stderr)
+
+    if args.sample:
+        import atexit
+        import sys
+        from evaluator.sampling import Sampler
+        sampler = Sampler(args.sample_interval / 1000)
+        sampler.start()
+
+        @atexit.register
+        def write_samples():
+            sampler.stop()
+            source = None
+            if args.file:
+                with open(args.file, 'r') as f:
+                    source = f.read()
+            files = sampler.write(args.sample, source)
+            print(f"samples written to {', '.join(files)}", file=sys.stderr)
+
+    stats = None
+    if args.stats or args.stats_json:
+        import atexit
+        import json
+        import sys
+        from evaluator.stats import Stats
+        stats = Stats()
+        stats.start()
+
+        @atexit.register
+        def write_stats():
+            stats.stop()
+            if args.stats_json:
+                with open(args.stats_json, "w") as f:
+                    json.dump(stats.as_dict(), f, indent=2)
+            if args.stats:
+                sys.stderr.write(stats.report())
+
+    if args.memstats:
+        import atexit
+        import sys
+        from evaluator.memstats import tracker
+        tracker.start()
+
+        @atexit.register
+        def write_memstats():
+            tracker.stop()
+            tracker.write(args.memstats)
+            sys.stderr.write(tracker.report())
+            print(f"heap snapshot written to {args.memstats}", file=sys.stderr)
 
     if args.file:
         with open(args.file, 'r') as source_code:
@@ -54,10 +167,10 @@ if __name__ == "__main__":
             case 'parser':
                 parse_code(code, args.mode)
             case 'eval':
-                eval_code(code)
+                eval_code(code, stats)
             case _:
                 print("unknown run type, will run as evaluator")
-                eval_code(code)
+                eval_code(code, stats)
     else:
         match args.run:
             case 'lexer':
@@ -65,7 +178,7 @@ if __name__ == "__main__":
             case 'parser':
                 run_parser_repl(args.mode)
             case 'eval':
-                run_evaluator_repl()
+                run_evaluator_repl(stats)
             case _:
                 print("unknown run type, will run as evaluator")
-                run_evaluator_repl()
+                run_evaluator_repl(stats)
@@ -10,24 +10,40 @@ from enum import IntEnum
 class ExpLevel(IntEnum):
     """表达式优先级"""
     LOWEST      = 0
-    EQUALS      = 1 # ==
-    LESSGREATER = 2 # > or <
-    SUM         = 3 # +
-    PRODUCT     = 4 # *
-    PREFIX      = 5 # -X or !X
-    CALL        = 6 # func(X)
-    INDEX_VISIT = 7 # array[idx] or X->Y
+    LOGIC_OR    = 1 # ||
+    LOGIC_AND   = 2 # &&
+    BIT_OR      = 3 # |
+    BIT_XOR     = 4 # ^
+    BIT_AND     = 5 # &
+    EQUALS      = 6 # ==
+    LESSGREATER = 7 # > or < or >= or <=
+    SHIFT       = 8 # << or >>
+    SUM         = 9 # +
+    PRODUCT     = 10 # * or / or %
+    PREFIX      = 11 # -X or !X
+    CALL        = 12 # func(X)
+    INDEX_VISIT = 13 # array[idx] or X->Y
 
 
 token_level: dict[TokenType, ExpLevel] = {
+    TokenType.OR:       ExpLevel.LOGIC_OR,
+    TokenType.AND:      ExpLevel.LOGIC_AND,
+    TokenType.BIT_OR:   ExpLevel.BIT_OR,
+    TokenType.BIT_XOR:  ExpLevel.BIT_XOR,
+    TokenType.BIT_AND:  ExpLevel.BIT_AND,
     TokenType.EQ:       ExpLevel.EQUALS,
     TokenType.NOT_EQ:   ExpLevel.EQUALS,
     TokenType.LT:       ExpLevel.LESSGREATER,
     TokenType.GT:       ExpLevel.LESSGREATER,
+    TokenType.LT_EQ:    ExpLevel.LESSGREATER,
+    TokenType.GT_EQ:    ExpLevel.LESSGREATER,
+    TokenType.SHL:      ExpLevel.SHIFT,
+    TokenType.SHR:      ExpLevel.SHIFT,
     TokenType.PLUS:     ExpLevel.SUM,
     TokenType.MINUS:    ExpLevel.SUM,
     TokenType.SLASH:    ExpLevel.PRODUCT,
     TokenType.ASTERISK: ExpLevel.PRODUCT,
+    TokenType.PERCENT:  ExpLevel.PRODUCT,
     TokenType.LPAREN:   ExpLevel.CALL,
     TokenType.LBRACKET: ExpLevel.INDEX_VISIT,
     TokenType.VISIT:    ExpLevel.INDEX_VISIT,
@@ -91,6 +107,16 @@ class Parser():
         self.register_leds(TokenType.NOT_EQ,    self.parse_infix_expression)
         self.register_leds(TokenType.LT,        self.parse_infix_expression)
         self.register_leds(TokenType.GT,        self.parse_infix_expression)
+        self.register_leds(TokenType.PERCENT,   self.parse_infix_expression)
+        self.register_leds(TokenType.LT_EQ,     self.parse_infix_expression)
+        self.register_leds(TokenType.GT_EQ,     self.parse_infix_expression)
+        self.register_leds(TokenType.BIT_AND,   self.parse_infix_expression)
+        self.register_leds(TokenType.BIT_OR,    self.parse_infix_expression)
+        self.register_leds(TokenType.BIT_XOR,   self.parse_infix_expression)
+        self.register_leds(TokenType.SHL,       self.parse_infix_expression)
+        self.register_leds(TokenType.SHR,       self.parse_infix_expression)
+        self.register_leds(TokenType.AND,       self.parse_logical_expression)
+        self.register_leds(TokenType.OR,        self.parse_logical_expression)
         self.register_leds(TokenType.LPAREN,    self.parse_call_expression)
         self.register_leds(TokenType.LBRACKET,  self.parse_index_expression)
         self.register_leds(TokenType.VISIT,     self.parse_visit_expression)
@@ -168,6 +194,12 @@ class Parser():
                 return self.parse_return_statement()
             case TokenType.IMPORT:
                 return self.parse_import_statement()
+            case TokenType.WHILE:
+                return self.parse_while_statement()
+            case TokenType.FOR:
+                return self.parse_for_statement()
+            case TokenType.STRUCT:
+                return self.parse_struct_statement()
             case _:
                 return self.parse_expression_statement()
     
@@ -222,6 +254,8 @@ class Parser():
         self.next_token()
 
         stmt_value = self.parse_expression(ExpLevel.LOWEST)
+        if isinstance(stmt_value, ast.FunctionLiteral):
+            stmt_value.name = stmt_name.value
 
         if self.peek_tok.type == TokenType.SEMICOLON:
             self.next_token()
@@ -291,6 +325,23 @@ class Parser():
         )
 
 
+    def parse_logical_expression(self, left: ast.Expression) -> ast.Expression:
+        """解析短路逻辑运算符节点"""
+        exp_token = self.cur_tok
+        exp_operator = self.cur_tok.literal
+
+        level = self.get_current_precedence()
+        self.next_token()
+        exp_right = self.parse_expression(level)
+
+        return ast.LogicalExpression(
+            token=exp_token,
+            operator=exp_operator,
+            left=left,
+            right=exp_right
+        )
+
+
     def parse_boolean(self) -> ast.Expression:
         """解析布尔运算符节点"""
         exp_token = self.cur_tok
@@ -526,3 +577,85 @@ class Parser():
         exp.right = right
 
         return exp
+
+
+    def parse_while_statement(self) -> ast.WhileStatement:
+        """解析 WHILE 循环语句节点"""
+        stmt = ast.WhileStatement(self.cur_tok)
+
+        if not self.expect_peek(TokenType.LPAREN):
+            return None
+
+        self.next_token()
+        stmt.condition = self.parse_expression(ExpLevel.LOWEST)
+
+        if not self.expect_peek(TokenType.RPAREN):
+            return None
+        if not self.expect_peek(TokenType.LBRACE):
+            return None
+
+        stmt.body = self.parse_block_statement()
+
+        if self.peek_tok.type == TokenType.SEMICOLON:
+            self.next_token()
+
+        return stmt
+
+
+    def parse_struct_statement(self) -> ast.StructStatement:
+        """解析结构体声明语句节点, 如 struct Point { x, y }"""
+        stmt = ast.StructStatement(self.cur_tok)
+
+        if not self.expect_peek(TokenType.IDENT):
+            return None
+        stmt.name = ast.Identifier(self.cur_tok, self.cur_tok.literal)
+
+        if not self.expect_peek(TokenType.LBRACE):
+            return None
+
+        while self.peek_tok.type != TokenType.RBRACE:
+            if not self.expect_peek(TokenType.IDENT):
+                return None
+            field = ast.Identifier(self.cur_tok, self.cur_tok.literal)
+            if any(f.value == field.value for f in stmt.fields):
+                self.recordError(f"duplicate field '{field.value}' in struct {stmt.name.value}")
+                return None
+            stmt.fields.append(field)
+            if self.peek_tok.type != TokenType.RBRACE and not self.expect_peek(TokenType.COMMA):
+                return None
+        self.next_token()
+
+        if self.peek_tok.type == TokenType.SEMICOLON:
+            self.next_token()
+
+        return stmt
+
+
+    def parse_for_statement(self) -> ast.ForStatement:
+        """解析 FOR-IN 循环语句节点"""
+        stmt = ast.ForStatement(self.cur_tok)
+
+        if not self.expect_peek(TokenType.LPAREN):
+            return None
+        if not self.expect_peek(TokenType.IDENT):
+            return None
+
+        stmt.variable = ast.Identifier(self.cur_tok, self.cur_tok.literal)
+
+        if not self.expect_peek(TokenType.IN):
+            return None
+
+        self.next_token()
+        stmt.iterable = self.parse_expression(ExpLevel.LOWEST)
+
+        if not self.expect_peek(TokenType.RPAREN):
+            return None
+        if not self.expect_peek(TokenType.LBRACE):
+            return None
+
+        stmt.body = self.parse_block_statement()
+
+        if self.peek_tok.type == TokenType.SEMICOLON:
+            self.next_token()
+
+        return stmt
@@ -119,6 +119,9 @@ class PrefixExpression(Expression):
 
 class InfixExpression(Expression):
     """中缀表达式节点"""
+    specialized = None
+    """求值器根据运行时观察到的类型写入的特化实现, None 表示尚未特化"""
+
     def __init__(
             self,
             token: Token = None,
@@ -142,6 +145,31 @@ class InfixExpression(Expression):
         return self.token.position
 
 
+class LogicalExpression(Expression):
+    """短路逻辑表达式节点, 即 '&&' 与 '||'"""
+    def __init__(
+            self,
+            token: Token = None,
+            left: Expression = None,
+            operator: str = '',
+            right: Expression = None
+        ):
+        self.token: Token = token
+        """逻辑运算符词法单元"""
+        self.left: Expression = left
+        self.operator: str = operator
+        self.right: Expression = right
+
+    def TokenLiteral(self) -> str:
+        return self.token.literal
+
+    def tostring(self) -> str:
+        return f"({self.left.tostring()} {self.operator} {self.right.tostring()})"
+
+    def TokenPos(self) -> Position:
+        return self.token.position
+
+
 class Boolean(Expression):
     """布尔表达式节点"""
     def __init__(
@@ -196,11 +224,15 @@ class IfExpression(Expression):
 
 class FunctionLiteral(Expression):
     """函数字面量节点"""
+    free = None
+    """求值器计算并缓存的自由变量集合"""
+
     def __init__(
             self,
             token: Token = None,
             parameters: list[Identifier] = None,
-            body: "BlockStatement" = None
+            body: "BlockStatement" = None,
+            name: str = ''
         ):
         self.token = token
         """FN 词法单元"""
@@ -209,6 +241,8 @@ class FunctionLiteral(Expression):
         else:
             self.parameters: list[Identifier] = []
         self.body = body
+        self.name = name
+        """直接绑定该函数的 let 语句中的名字, 匿名函数为空字符串"""
     
     def TokenLiteral(self) -> str:
         return self.token.literal
@@ -225,6 +259,9 @@ class FunctionLiteral(Expression):
 
 class CallExpression(Expression):
     """调用表达式 节点"""
+    specialized = None
+    """求值器根据运行时观察到的类型写入的特化实现, None 表示尚未特化"""
+
     def __init__(
             self,
             token: Token = None,
@@ -299,6 +336,9 @@ class ArrayLiteral(Expression):
 
 class IndexExpression(Expression):
     """取下标表达式 节点"""
+    specialized = None
+    """求值器根据运行时观察到的类型写入的特化实现, None 表示尚未特化"""
+
     def __init__(
             self,
             token: Token = None,
@@ -385,6 +425,9 @@ class NullLiteral(Expression):
 
 class VisitExpression(Expression):
     """属性访问表达式"""
+    specialized = None
+    """求值器缓存的记录字段位置 (结构体类型, 字段下标)"""
+
     def __init__(
             self,
             token: Token = None,
@@ -485,6 +528,11 @@ class ReturnStatement(Statement):
 
 class BlockStatement(Statement):
     """块语句节点"""
+    compiled = None
+    """作为函数体时由求值器写入的编译结果, None 表示尚未尝试编译"""
+    leaf = None
+    """作为函数体时由求值器写入, 表示函数体内是否不含嵌套的函数字面量"""
+
     def __init__(
             self,
             token: Token = None,
@@ -522,3 +570,74 @@ class ImportStatement(Statement):
     
     def TokenPos(self) -> Position:
         return self.token.position
+
+
+class WhileStatement(Statement):
+    """while 循环语句节点"""
+    def __init__(
+            self,
+            token: Token = None,
+            condition: Expression = None,
+            body: BlockStatement = None
+        ):
+        self.token = token
+        """WHILE 词法单元"""
+        self.condition = condition
+        self.body = body
+
+    def TokenLiteral(self) -> str:
+        return self.token.literal
+
+    def tostring(self) -> str:
+        return f"while {self.condition.tostring()} {self.body.tostring()}"
+
+    def TokenPos(self) -> Position:
+        return self.token.position
+
+
+class ForStatement(Statement):
+    """for-in 循环语句节点"""
+    def __init__(
+            self,
+            token: Token = None,
+            variable: Identifier = None,
+            iterable: Expression = None,
+            body: BlockStatement = None
+        ):
+        self.token = token
+        """FOR 词法单元"""
+        self.variable = variable
+        self.iterable = iterable
+        self.body = body
+
+    def TokenLiteral(self) -> str:
+        return self.token.literal
+
+    def tostring(self) -> str:
+        return f"for ({self.variable.tostring()} in {self.iterable.tostring()}) {self.body.tostring()}"
+
+    def TokenPos(self) -> Position:
+        return self.token.position
+
+
+class StructStatement(Statement):
+    """结构体声明语句节点"""
+    def __init__(
+            self,
+            token: Token = None,
+            name: Identifier = None,
+            fields: list[Identifier] = None
+        ):
+        self.token = token
+        """STRUCT 词法单元"""
+        self.name = name
+        self.fields = fields if fields else []
+
+    def TokenLiteral(self) -> str:
+        return self.token.literal
+
+    def tostring(self) -> str:
+        return f"struct {self.name.tostring()} {{ {', '.join([f.tostring() for f in self.fields])} }}"
+
+    def TokenPos(self) -> Position:
+        return self.token.position
@@ -0,0 +1,27 @@
+import pytest
+import evaluator
+from lexer import Lexer
+from parser import Parser
+from evaluator import jit
+from evaluator.objsys import Environment
+
+
+def parse(code: str):
+    p = Parser(Lexer(code))
+    program = p.parse_program()
+    assert not p.errors, [str(e) for e in p.errors]
+    return program
+
+
+def evaluate(code: str, env: Environment = None) -> str:
+    """求值并返回结果的字符串表示"""
+    return evaluator.Eval(parse(code), env or Environment()).inspect()
+
+
+@pytest.fixture(params=[True, False], ids=["jit", "no-jit"])
+def jit_mode(request):
+    """分别在开启与关闭 JIT 时运行, 对比两种执行方式的结果"""
+    enabled = jit.enabled
+    jit.enabled = request.param
+    yield request.param
+    jit.enabled = enabled
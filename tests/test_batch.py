@@ -0,0 +1,34 @@
+import signal
+import pytest
+from evaluator import batch
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs SIGALRM")
+
+
+@pytest.fixture
+def worker():
+    handler = signal.getsignal(signal.SIGALRM)
+    batch.init_worker(no_jit=False)
+    yield
+    signal.signal(signal.SIGALRM, handler)
+
+
+def test_timeout_during_import(tmp_path, monkeypatch, worker):
+    (tmp_path / "slow.monkey").write_text("let spin = fn() { while (true) { 1 } }; spin();")
+    script = tmp_path / "main.monkey"
+    script.write_text("import slow; 1")
+    monkeypatch.chdir(tmp_path)
+    record = batch.run_job(str(script), 0.2)
+    assert record["status"] == "timeout", record
+    assert record["error"] == "timed out after 0.2s"
+
+
+def test_run_job_records_output_and_errors(tmp_path, worker):
+    ok = tmp_path / "ok.monkey"
+    ok.write_text('puts("hi"); 1 + 2')
+    bad = tmp_path / "bad.monkey"
+    bad.write_text("1 + true")
+    record = batch.run_job(str(ok), 5)
+    assert (record["status"], record["output"]) == ("ok", "hi\n3\n")
+    record = batch.run_job(str(bad), 5)
+    assert record["status"] == "error" and "type mismatch" in record["error"]
@@ -0,0 +1,20 @@
+from bench.runner import check_meta
+
+META = {"python": "3.11.7", "platform": "Linux", "jit": True, "repeat": 5, "warmup": 1}
+
+
+def test_same_settings_compare():
+    assert check_meta(META, dict(META, python="3.11.9", repeat=3)) == ([], [])
+
+
+def test_jit_mismatch_is_refused():
+    errors, _ = check_meta(META, dict(META, jit=False))
+    assert errors == ["baseline was run with jit=True, this run with jit=False"]
+    errors, _ = check_meta({}, META)
+    assert errors
+
+
+def test_python_mismatch_warns():
+    errors, warnings = check_meta(META, dict(META, python="3.12.1"))
+    assert not errors
+    assert warnings == ["baseline was run on python 3.11.7, this run on 3.12.1"]
@@ -0,0 +1,31 @@
+from tests.conftest import evaluate
+
+
+def test_empty_bytes_variable_is_found(jit_mode):
+    assert evaluate('let e = slice(encode("abc"), 1, 1); len(e)') == "0"
+    code = """
+    let e = slice(encode("abc"), 1, 1);
+    let f = fn() { len(e) };
+    let run = fn(n) {
+        let i = 0;
+        while (true) {
+            if (i == n) { return f(); }
+            f();
+            let i = i + 1;
+        }
+    };
+    run(150);
+    """
+    assert evaluate(code) == "0"
+
+
+def test_empty_mmap_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert evaluate(f'let m = mmap_file("{path}"); len(m)') == "0"
+
+
+def test_empty_bytes_module_member(tmp_path, monkeypatch):
+    (tmp_path / "blob.monkey").write_text('let empty = slice(encode("a"), 0, 0);')
+    monkeypatch.chdir(tmp_path)
+    assert evaluate("import blob; len(blob->empty)") == "0"
@@ -0,0 +1,72 @@
+from tests.conftest import evaluate
+
+
+def test_closure_created_in_for_loop_keeps_frame_names(jit_mode):
+    code = """
+    let mk = fn() {
+        let a = 1;
+        let b = 2;
+        let f = fn() { a };
+        for (i in [1]) { return [f, fn() { b }]; }
+    };
+    mk()[1]();
+    """
+    assert evaluate(code) == "2"
+
+
+def test_closure_created_in_while_loop_keeps_frame_names(jit_mode):
+    code = """
+    let mk = fn(n) {
+        let base = 10;
+        let i = 0;
+        while (true) {
+            let i = i + 1;
+            if (i == n) { return fn() { base + i }; }
+        }
+    };
+    mk(3)();
+    """
+    assert evaluate(code) == "13"
+
+
+def test_closure_created_in_nested_blocks(jit_mode):
+    code = """
+    let mk = fn() {
+        let x = 5;
+        let unused = 7;
+        let g = fn() { unused };
+        for (i in [1, 2]) {
+            if (i == 2) {
+                while (true) { return fn() { x * i }; }
+            }
+        }
+    };
+    let outer = fn() {
+        for (j in [1]) {
+            return mk();
+        }
+    };
+    outer()();
+    """
+    assert evaluate(code) == "10"
+
+
+def test_closures_in_hot_function(jit_mode):
+    code = """
+    let adder = fn(n) {
+        let k = n * 2;
+        let g = fn() { n };
+        for (i in [0]) { return fn(x) { x + k + i }; }
+    };
+    let run = fn(n) {
+        let i = 0;
+        let acc = 0;
+        while (true) {
+            if (i == n) { return acc; }
+            let acc = acc + adder(i)(1);
+            let i = i + 1;
+        }
+    };
+    run(200);
+    """
+    assert evaluate(code) == str(sum(2 * i + 1 for i in range(200)))
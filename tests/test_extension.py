@@ -0,0 +1,45 @@
+import pytest
+from evaluator import extension
+from tests.conftest import evaluate
+
+EXTENSION = """
+import os
+with open(os.path.join(os.path.dirname(__file__), "loads.txt"), "a") as f:
+    f.write("x")
+
+def register(module):
+    @module.function
+    def double(x):
+        return x * 2
+"""
+
+
+@pytest.fixture
+def ext_dir(tmp_path, monkeypatch):
+    """包含扩展模块 ext.py 的目录, 每个测试使用空的模块缓存"""
+    (tmp_path / "ext.py").write_text(EXTENSION)
+    monkeypatch.setattr(extension, "loaded", {})
+    monkeypatch.delenv("MONKEYPATH", raising=False)
+    return tmp_path
+
+
+def test_current_directory_is_not_searched(ext_dir, monkeypatch):
+    monkeypatch.chdir(ext_dir)
+    assert evaluate("import ext;").endswith("import error, can not load 'ext'")
+    assert not (ext_dir / "loads.txt").exists()
+
+
+def test_monkeypath_and_explicit_paths(ext_dir, monkeypatch):
+    monkeypatch.setenv("MONKEYPATH", str(ext_dir))
+    assert evaluate("import ext; ext->double(21)") == "42"
+    monkeypatch.delenv("MONKEYPATH")
+    monkeypatch.setattr(extension, "loaded", {})
+    monkeypatch.setattr(extension, "paths", [str(ext_dir)])
+    assert evaluate("import ext; ext->double(4)") == "8"
+
+
+def test_extension_runs_once(ext_dir, monkeypatch):
+    monkeypatch.setattr(extension, "paths", [str(ext_dir)])
+    assert evaluate("import ext; ext->double(1)") == "2"
+    assert evaluate("import ext; ext->double(2)") == "4"
+    assert (ext_dir / "loads.txt").read_text() == "x"
@@ -0,0 +1,116 @@
+import evaluator
+from evaluator import instrument, jit
+from evaluator.hooks import hooks
+from evaluator.memstats import tracker
+from evaluator.profile import Profiler
+from evaluator.stats import Stats
+from tests.conftest import evaluate
+
+FIB = "let fib = fn(n) { if (n < 2) { return n; } fib(n - 1) + fib(n - 2) }; fib(10);"
+
+
+def counter(calls: list):
+    def wrapper(func):
+        def counted(*args):
+            calls.append(1)
+            return func(*args)
+        return counted
+    return wrapper
+
+
+def test_profiler_restores_original():
+    apply_function = evaluator.apply_function
+    prof = Profiler()
+    prof.start()
+    assert evaluate(FIB) == "55"
+    prof.stop()
+    assert evaluator.apply_function is apply_function
+    assert prof.stats["fib@1:17"][0] == 177
+
+
+def test_layers_stop_in_any_order():
+    apply_function = evaluator.apply_function
+    owner = object()
+    calls = []
+    instrument.wrap(owner, evaluator, "apply_function", counter(calls))
+    prof = Profiler()
+    prof.start()
+    instrument.unwrap(owner)
+    assert evaluate(FIB) == "55"
+    assert not calls
+    assert prof.stats["fib@1:17"][0] == 177
+    prof.stop()
+    assert evaluator.apply_function is apply_function
+
+
+def test_layers_nest():
+    apply_function = evaluator.apply_function
+    outer, inner = object(), object()
+    outer_calls, inner_calls = [], []
+    instrument.wrap(inner, evaluator, "apply_function", counter(inner_calls))
+    instrument.wrap(outer, evaluator, "apply_function", counter(outer_calls))
+    evaluate(FIB)
+    instrument.unwrap(inner)
+    evaluate(FIB)
+    instrument.unwrap(outer)
+    assert evaluator.apply_function is apply_function
+    assert len(inner_calls) == 177 and len(outer_calls) == 2 * 177
+
+
+def test_hooks_compose_with_profiler():
+    apply_function = evaluator.apply_function
+    error_init = evaluator.objsys.Error.__init__
+    returns = []
+    hooks.on_return(lambda func, args, result, elapsed: returns.append(func))
+    hooks.on_error(lambda error: None)
+    prof = Profiler()
+    prof.start()
+    hooks.clear()
+    assert evaluate(FIB) == "55"
+    assert not returns
+    prof.stop()
+    assert evaluator.apply_function is apply_function
+    assert evaluator.objsys.Error.__init__ is error_init
+
+
+def test_profiler_compose_with_hooks():
+    apply_function = evaluator.apply_function
+    returns = []
+    prof = Profiler()
+    prof.start()
+    hooks.on_return(lambda func, args, result, elapsed: returns.append(func))
+    prof.stop()
+    assert evaluate(FIB) == "55"
+    assert len(returns) == 177
+    assert not prof.stats
+    hooks.clear()
+    assert evaluator.apply_function is apply_function
+
+
+def test_stats_compose_with_profiler():
+    Eval, apply_function = evaluator.Eval, evaluator.apply_function
+    enabled = jit.enabled
+    stats = Stats()
+    stats.start()
+    prof = Profiler()
+    prof.start()
+    stats.stop()
+    assert jit.enabled == enabled
+    assert evaluator.Eval is Eval
+    assert evaluate(FIB) == "55"
+    assert not stats.nodes
+    assert prof.stats["fib@1:17"][0] == 177
+    prof.stop()
+    assert evaluator.apply_function is apply_function
+
+
+def test_memstats_compose_with_error_hooks():
+    init = evaluator.objsys.Error.__init__
+    errors = []
+    tracker.start()
+    hooks.on_error(errors.append)
+    tracker.stop()
+    evaluate("1 + true;")
+    assert len(errors) == 1
+    hooks.clear()
+    assert evaluator.objsys.Error.__init__ is init
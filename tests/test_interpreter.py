@@ -0,0 +1,63 @@
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import re
+import pytest
+from evaluator.interpreter import ExecutionError, Interpreter
+
+PRELUDE = """
+let fib = fn(n) { if (n < 2) { return n; } fib(n - 1) + fib(n - 2) };
+let table = {"double": fn(x) { x * 2 }, "square": fn(x) { x * x }};
+"""
+
+RULE = """
+let f = table[op];
+puts(op, x);
+[f(x), fib(x % 10), op]
+"""
+
+
+def test_runs_do_not_share_bindings():
+    interp = Interpreter(prelude="let base = 1;")
+    program = interp.compile("let base = base + n; base")
+    assert program.run({"n": 1}) == 2
+    assert program.run({"n": 5}) == 6
+    assert interp.run("base") == 1
+    with pytest.raises(ExecutionError):
+        interp.run("missing")
+
+
+@pytest.mark.parametrize("prelude, path", [
+    ("let sb = string_builder();", "sb"),
+    ('let parts = [1, {"it": json_lines("{jsonl}")}];', 'parts[1]["it"]'),
+    ("let make = fn() { let sb = string_builder(); fn() { append(sb, 1) } }; let add = make();", "add.sb"),
+])
+def test_rejects_stateful_values_in_base(prelude, path, tmp_path):
+    jsonl = tmp_path / "x.jsonl"
+    jsonl.write_text('{"a": 1}\n')
+    with pytest.raises(ValueError, match=re.escape(f"'{path}' is a")):
+        Interpreter(prelude=prelude.replace("{jsonl}", str(jsonl)))
+
+
+def test_concurrent_runs_match_sequential(jit_mode):
+    interp = Interpreter(prelude=PRELUDE)
+    program = interp.compile(RULE)
+    jobs = [{"op": ("double", "square")[i % 2], "x": i} for i in range(200)]
+
+    def run(globals):
+        stdout = io.StringIO()
+        return program.run(globals, stdout), stdout.getvalue()
+
+    expected = [run(g) for g in jobs]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    stack_size = threading.stack_size(16 << 20)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(run, jobs))
+    finally:
+        threading.stack_size(stack_size)
+        sys.setswitchinterval(interval)
+    assert results == expected
+    assert expected[3] == ([9, 2, "square"], "square 3\n")
@@ -0,0 +1,36 @@
+from tests.conftest import evaluate
+
+
+def test_json_dump_rejects_non_string_keys():
+    assert evaluate('json_dump({1: 2, true: 3})').endswith("`json_dump` not support non-string hash key INTEGER")
+    assert evaluate('json_dump([{"a": {false: 1}}])').endswith("non-string hash key BOOLEAN")
+
+
+def test_json_round_trip():
+    code = 'json_dump(json_parse(json_dump({"a": [1, "x", null, true], "b": {"c": 2}})))'
+    assert evaluate(code) == '"{"a": [1, "x", null, true], "b": {"c": 2}}"'
+
+
+def test_json_lines_opens_file_lazily(tmp_path, monkeypatch):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"a": 1}\n\n{"a": 2}\n')
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        file = real_open(*args, **kwargs)
+        opened.append(file)
+        return file
+    monkeypatch.setattr("builtins.open", tracking_open)
+    assert evaluate(f'json_lines("{path}"); 1') == "1"
+    assert not opened
+    code = f'for (r in json_lines("{path}")) {{ r["a"] }}; 1'
+    assert evaluate(code) == "1"
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_json_lines_reports_missing_file_when_iterated(tmp_path):
+    path = tmp_path / "missing.jsonl"
+    assert evaluate(f'let it = json_lines("{path}"); 1') == "1"
+    result = evaluate(f'for (r in json_lines("{path}")) {{ r }}')
+    assert result.endswith(f"can not open '{path}': No such file or directory")
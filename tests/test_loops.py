@@ -0,0 +1,70 @@
+from tests.conftest import evaluate
+
+COLLECT = """
+let collect = fn(items) {
+    let sb = string_builder();
+    for (x in items) { append(sb, x, ";"); }
+    build(sb)
+};
+"""
+
+
+def test_while_counts(jit_mode):
+    code = "let count = fn(n) { let i = 0; while (true) { if (i == n) { return i; } let i = i + 1; } }; count(5)"
+    assert evaluate(code) == "5"
+
+
+def test_while_body_scope(jit_mode):
+    code = "let i = 0; while (i < 3) { let i = i + 1; let inner = i; }; [i, inner]"
+    assert evaluate(code).endswith("identifier not found: inner")
+    assert evaluate("let i = 0; while (i < 3) { let i = i + 1; }; i") == "0"
+
+
+def test_for_variable_scope(jit_mode):
+    assert evaluate("let x = 10; for (x in [1, 2]) { let y = x; }; x") == "10"
+    assert evaluate("for (x in [1, 2]) { let y = x; }; y").endswith("identifier not found: y")
+    assert evaluate("for (x in [1, 2]) { 0 }; x").endswith("identifier not found: x")
+
+
+def test_for_closures_see_each_item(jit_mode):
+    code = """
+    let sb = string_builder();
+    for (x in [1, 2, 3]) { let f = fn() { x * 10 }; append(sb, f()); }
+    build(sb)
+    """
+    assert evaluate(code) == '"102030"'
+
+
+def test_return_leaves_loops(jit_mode):
+    find = "let find = fn(items, want) { for (x in items) { if (x == want) { return true; } } false };"
+    assert evaluate(find + "[find([1, 2, 3], 2), find([1, 2, 3], 4)]") == "[True, False]"
+    nested = "let f = fn() { while (true) { for (x in [1, 2]) { while (true) { return x * 7; } } } }; f()"
+    assert evaluate(nested) == "7"
+
+
+def test_errors_leave_loops(jit_mode):
+    assert evaluate('let i = 0; while (true) { let i = i + 1; if (i == 3) { i + true; } }').endswith(
+        "type mismatch: INTEGER + BOOLEAN")
+    assert evaluate("for (x in [1, true, 3]) { -x }; 1").endswith("unknown operator: -BOOLEAN")
+    assert evaluate("while (1 + true) { 1 }").endswith("type mismatch: INTEGER + BOOLEAN")
+    assert evaluate("for (x in 5) { x }").endswith("for-in not supported: INTEGER is not iterable")
+
+
+def test_for_iterates_arrays_hashes_and_strings(jit_mode):
+    assert evaluate(COLLECT + "collect([1, \"a\", true])") == '"1;a;True;"'
+    assert evaluate(COLLECT + 'collect({"a": 1, "b": 2})') == '"a;b;"'
+    assert evaluate(COLLECT + 'collect("héllo")') == '"h;é;l;l;o;"'
+    assert evaluate(COLLECT + "collect([])") == '""'
+
+
+def test_for_iterates_iterators(tmp_path, jit_mode):
+    path = tmp_path / "lines.txt"
+    path.write_text("one\ntwo\n")
+    assert evaluate(COLLECT + f'collect(read_lines("{path}"))') == '"one;two;"'
+    jsonl = tmp_path / "data.jsonl"
+    jsonl.write_text('{"a": 1}\n{"a": 2}\nnot json\n')
+    code = f'for (r in json_lines("{jsonl}")) {{ puts(r["a"]); }}'
+    assert f"invalid json at {jsonl}:3" in evaluate(code)
+    # 迭代器只能遍历一次
+    code = COLLECT + f'let it = read_lines("{path}"); [collect(it), collect(it)]'
+    assert evaluate(code) == '["one;two;", ""]'
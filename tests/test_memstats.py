@@ -0,0 +1,53 @@
+import evaluator
+from evaluator import objsys as obj
+from evaluator.memstats import tracker
+from evaluator.objsys import Environment
+from tests.conftest import evaluate, parse
+
+
+def test_memstats_result_is_not_counted():
+    env = Environment()
+    program = parse("memstats();")
+    tracker.start()
+    try:
+        evaluator.Eval(program, env)
+        before = sum(tracker.total.values())
+        result = evaluator.Eval(program, env)
+        after = sum(tracker.total.values())
+    finally:
+        tracker.stop()
+    assert result.type() == evaluator.objsys.ObjectType.HASH_OBJ
+    assert after == before
+
+
+def test_counts_allocations_by_type_and_site():
+    tracker.start()
+    try:
+        evaluate("let a = [10, 20];")
+    finally:
+        tracker.stop()
+    snap = tracker.snapshot()
+    assert snap["allocation_sites"]["1:9"] == {"Array": 1}
+    assert snap["allocation_sites"]["1:10"] == {"Integer": 1}
+    assert snap["types"]["Array"]["total"] == 1
+
+
+def test_stop_restores_classes():
+    inits = {cls: vars(cls).get("__init__") for cls in (obj.MonkeyObj, obj.Integer, obj.Error, Environment)}
+    tracker.start()
+    tracker.stop()
+    for cls, init in inits.items():
+        assert vars(cls).get("__init__") is init
+        assert "__new__" not in vars(cls) and "__del__" not in vars(cls)
+    assert obj.MonkeyObj.__new__ is object.__new__
+    assert "__init_subclass__" not in vars(obj.MonkeyObj)
+    assert evaluate('let h = {"a": [1, 2]}; h["a"]') == "[1, 2]"
+
+
+def test_counts_ropes():
+    tracker.start()
+    try:
+        evaluate('let s = "' + "x" * 300 + '"; let t = s + s;')
+    finally:
+        tracker.stop()
+    assert tracker.snapshot()["allocation_sites"]["1:323"] == {"String": 1}
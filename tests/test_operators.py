@@ -0,0 +1,35 @@
+import pytest
+from tests.conftest import evaluate
+
+
+def hot(expr: str) -> str:
+    """在调用次数足以触发 JIT 的函数中对 expr 求值, x 与 y 为参数"""
+    return f"""
+    let f = fn(x, y) {{ {expr} }};
+    let run = fn(n) {{
+        let i = 0;
+        while (true) {{
+            if (i == n) {{ return f(7, 0); }}
+            f(7, 2);
+            let i = i + 1;
+        }}
+    }};
+    run(150);
+    """
+
+
+@pytest.mark.parametrize("op, name", [("%", "modulo"), ("/", "division")])
+def test_divide_by_zero_is_runtime_error(jit_mode, op, name):
+    assert evaluate(f"7 {op} 0").endswith(f"{name} by zero")
+    assert evaluate(f"let z = 0; 7 {op} z").endswith(f"{name} by zero")
+    assert evaluate(hot(f"x {op} y")).endswith(f"{name} by zero")
+    assert evaluate(hot(f"x {op} 0")).endswith(f"{name} by zero")
+
+
+def test_divide_by_zero_reports_position(jit_mode):
+    assert evaluate("let a = 1;\nlet b = a % 0;").startswith("runtime error: line 2, column 11")
+    assert evaluate(hot("x % y")) == "runtime error: line 2, column 26\n  modulo by zero"
+
+
+def test_division_and_modulo(jit_mode):
+    assert evaluate("let f = fn(x) { x % 3 }; f(-7) + 10 / 3") == "5"
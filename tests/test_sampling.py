@@ -0,0 +1,50 @@
+import sys
+from evaluator import jit
+from evaluator import objsys as obj
+from evaluator.builtins import NULL
+from evaluator.sampling import Sampler
+from tests.conftest import evaluate
+
+frames = []
+
+
+def probe(pos, args):
+    frames.append(sys._getframe())
+    return NULL
+
+
+DEPTH = """let down = fn(n) {
+  if (n < 1) { return probe(); }
+  down(n - 1)
+};
+let outer = fn() { down(2); probe() };
+outer();
+"""
+
+
+def test_sampler_turns_off_jit():
+    enabled = jit.enabled
+    sampler = Sampler()
+    sampler.start()
+    assert not jit.enabled
+    sampler.stop()
+    assert jit.enabled == enabled
+
+
+def test_sample_reads_monkey_stack():
+    frames.clear()
+    env = obj.Environment()
+    env.set("probe", obj.Python("probe", probe))
+    evaluate(DEPTH, env)
+    deep, shallow = frames
+    sampler = Sampler()
+    sampler.sample(deep)
+    sampler.sample(deep)
+    sampler.sample(shallow)
+    down, outer = "down@1:18", "outer@5:18"
+    assert sampler.stacks == {
+        f"<main>;{outer};{down};{down};{down}": 2,
+        f"<main>;{outer}": 1,
+    }
+    assert sampler.functions == {down: 2, outer: 1}
+    assert sampler.positions == {(2, 28): 2, (5, 34): 1}
@@ -0,0 +1,32 @@
+from evaluator import objsys as obj
+from tests.conftest import evaluate, parse
+import evaluator
+
+
+def test_call_error_does_not_deoptimize():
+    env = obj.Environment()
+    program = parse("let run = fn() { k() }; run();")
+    result = evaluator.Eval(program, env)
+    assert type(result) is obj.Error
+    call = program.statements[0].value.body.statements[0].expression
+    assert call.specialized is None
+
+    assert evaluate("let k = fn() { 1 }; run();", env) == "1"
+    assert call.specialized is obj.Function
+
+
+def test_call_type_change_falls_back_to_generic(jit_mode):
+    code = """
+    let call = fn(f, v) { f(v) };
+    let sum = fn(n) {
+        let i = 0;
+        let acc = 0;
+        while (true) {
+            if (i == n) { return acc; }
+            let acc = acc + call(fn(x) { x }, 3) + call(len, "ab");
+            let i = i + 1;
+        }
+    };
+    sum(150);
+    """
+    assert evaluate(code) == "750"
@@ -0,0 +1,74 @@
+from evaluator.objsys import Environment, String
+from tests.conftest import evaluate
+
+
+def test_format_positional_fields():
+    assert evaluate('format("{0} {1} {0:>3}", "a", "b")') == '"a b   a"'
+    assert evaluate('format("{0:{1}}", "a", 3)') == '"a  "'
+
+
+def test_format_rejects_attribute_fields():
+    result = evaluate('format("{0.__doc__}", "a")')
+    assert result.endswith("format error: unsupported field '{0.__doc__}'")
+
+
+def test_format_rejects_fields_nested_in_spec():
+    result = evaluate('format("{0:{1.__doc__}}", "a", "b")')
+    assert result.endswith("format error: unsupported field '{1.__doc__}'")
+    assert "str(" not in result
+
+
+def rope(text: str) -> String:
+    """由两半拼接得到的 rope"""
+    half = len(text) // 2
+    result = String.concat(String(text[:half]), String(text[half:]))
+    assert "value" not in vars(result)
+    return result
+
+
+A = "a" * 200 + "b" * 200
+
+
+def test_branching_concat_from_one_prefix():
+    prefix = rope(A)
+    x = String.concat(prefix, String("x"))
+    y = String.concat(prefix, String("y"))
+    assert y.value == A + "y"
+    assert x.value == A + "x"
+    assert prefix.value == A
+
+
+def test_concat_rope_with_rope():
+    left, right = rope(A), rope(A[::-1])
+    both = String.concat(left, right)
+    assert both.length() == 2 * len(A)
+    assert both.value == A + A[::-1]
+    assert left.value == A and right.value == A[::-1]
+
+
+def test_concat_after_flatten():
+    text = rope(A)
+    assert text.value == A
+    assert "parts" not in vars(text)
+    more = String.concat(text, String("c"))
+    assert more.value == A + "c"
+    assert String.concat(more, rope(A)).value == A + "c" + A
+
+
+def test_len_does_not_flatten():
+    text = String.concat(rope(A), String("tail"))
+    assert text.length() == len(A) + 4
+    assert evaluate("len(s)", env_with(s=text)) == str(len(A) + 4)
+    assert "value" not in vars(text)
+
+
+def test_rope_in_program(jit_mode):
+    code = 'let grow = fn(s, n) { if (n == 0) { return s; } grow(s + "abcdef", n - 1) }; let r = grow("", 50); [len(r), r[0], r[299], len(r + r)]'
+    assert evaluate(code) == '[300, "a", "f", 600]'
+
+
+def env_with(**values) -> Environment:
+    env = Environment()
+    for name, value in values.items():
+        env.set(name, value)
+    return env